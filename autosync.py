@@ -13,6 +13,7 @@ import colorlog
 import re
 import requests
 from tqdm import tqdm
+from site_build import build_site_files, build_summary, written_paths
 
 # Constants
 GITHUB_REPO = 'https://github.com/dareaquatics/dare-website'
@@ -299,6 +300,10 @@ def push_to_github():
         remote_url = f'https://{GITHUB_TOKEN}@github.com/dareaquatics/dare-website.git'
         repo.remotes.origin.set_url(remote_url)
 
+        build_results = build_site_files(os.getcwd(), [NEWS_HTML_FILE])
+        if build_results:
+            logging.info(build_summary(build_results))
+
         if repo.is_dirty(untracked_files=True):
             with tqdm(total=100, desc='Committing changes') as pbar:
                 def update_commit_pbar(cur_count, max_count=None, message=''):
@@ -307,7 +312,7 @@ def push_to_github():
                     pbar.update(cur_count - pbar.n)
                     pbar.set_postfix_str(message)
 
-                repo.git.add(NEWS_HTML_FILE)
+                repo.git.add(NEWS_HTML_FILE, *written_paths(build_results))
                 repo.index.commit('Automation: Sync TeamUnify Events w/ GitHub')
                 pbar.update(100)
 
@@ -0,0 +1,248 @@
+# Headless batch editor for dareaquatics/dare-website.
+# Applies selector-based operations from a JSON or YAML file across many HTML files,
+# using the same parsing and minimal-write saving as editor.py.
+
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import json
+import fnmatch
+import difflib
+import argparse
+import logging
+import git
+from editor import (
+    LOCAL_REPO_PATH,
+    fetch_html_content,
+    list_editable_text,
+    edit_text,
+    record_source_patch,
+    render_html_content,
+    write_file_atomically,
+    get_file_index,
+    make_process_pool,
+    pull_latest_changes,
+    push_changes,
+)
+
+ACTIONS = ('replace_text', 'set_attribute', 'rewrite_href')
+# Each action needs every key of at least one of these sets
+REQUIRED_KEYS = {
+    'replace_text': (('text',), ('find', 'replace')),
+    'set_attribute': (('attribute', 'value'),),
+    'rewrite_href': (('find', 'replace'),),
+}
+
+logger = logging.getLogger('batch_edit')
+
+
+def load_operations(ops_path):
+    with open(ops_path, 'r', encoding='utf-8') as file:
+        if ops_path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("PyYAML is required for YAML operation files (pip install pyyaml).")
+            data = yaml.safe_load(file)
+        else:
+            data = json.load(file)
+
+    # Either a bare list of operations or {"files": [...], "operations": [...]}
+    if isinstance(data, dict):
+        default_files = data.get('files', ['*.html'])
+        operations = data.get('operations', [])
+    else:
+        default_files = ['*.html']
+        operations = data
+
+    for i, operation in enumerate(operations):
+        if operation.get('action') not in ACTIONS:
+            raise ValueError(f"Operation {i}: action must be one of {', '.join(ACTIONS)}")
+        if not operation.get('selector'):
+            raise ValueError(f"Operation {i}: a CSS selector is required")
+        key_sets = REQUIRED_KEYS[operation['action']]
+        if not any(all(key in operation for key in keys) for keys in key_sets):
+            needed = ' or '.join('/'.join(keys) for keys in key_sets)
+            raise ValueError(f"Operation {i}: {operation['action']} needs {needed}")
+        if operation.get('regex') and 'find' in operation:
+            try:
+                re.compile(operation['find'])
+            except re.error as e:
+                raise ValueError(f"Operation {i}: invalid regex {operation['find']!r}: {e}")
+        files = operation.get('files', default_files)
+        operation['files'] = [files] if isinstance(files, str) else files
+    return operations
+
+
+def match_files(repo_path, operations):
+    html_files = get_file_index(repo_path).files_with_extension(('.html',))
+    matched = {}
+    for path in html_files:
+        file_operations = [
+            operation for operation in operations
+            if any(fnmatch.fnmatch(path, pattern) for pattern in operation['files'])
+        ]
+        if file_operations:
+            matched[path] = file_operations
+    return matched
+
+
+def substitute(value, operation):
+    if operation.get('regex'):
+        return re.sub(operation['find'], operation['replace'], value)
+    return value.replace(operation['find'], operation['replace'])
+
+
+def apply_replace_text(soup, tag, operation, editable_texts):
+    if 'find' in operation:
+        # Replace inside the existing strings so nested markup is left alone
+        changed = False
+        for string in list(tag.find_all(string=True)):
+            new_string = substitute(str(string), operation)
+            if new_string != str(string):
+                string.replace_with(new_string)
+                changed = True
+        if changed:
+            record_source_patch(tag)
+        return changed
+
+    if tag.get_text() == operation['text']:
+        return False
+    for text_id, text_info in editable_texts.items():
+        if text_info['tag'] is tag:
+            edit_text(soup, text_id, operation['text'], editable_texts)
+            return True
+    tag.clear()
+    tag.append(operation['text'])
+    record_source_patch(tag)
+    return True
+
+
+def apply_set_attribute(tag, operation):
+    if tag.get(operation['attribute']) == operation['value']:
+        return False
+    tag[operation['attribute']] = operation['value']
+    record_source_patch(tag)
+    return True
+
+
+def apply_rewrite_href(tag, operation):
+    if not tag.has_attr('href'):
+        return False
+    new_href = substitute(tag['href'], operation)
+    if new_href == tag['href']:
+        return False
+    tag['href'] = new_href
+    record_source_patch(tag)
+    return True
+
+
+def apply_operations(repo_path, file_path, operations, dry_run):
+    # Runs in a worker process; returns what changed so the parent can report and commit
+    soup, original_content = fetch_html_content(repo_path, file_path)
+    if soup is None:
+        return {'file': file_path, 'changes': 0, 'diff': '', 'error': 'could not parse file'}
+
+    editable_texts = list_editable_text(soup)
+    changes = 0
+    for operation in operations:
+        tags = soup.select(operation['selector'])
+        if operation['action'] == 'replace_text':
+            # Nested matches share their strings with the outer match, which already covers them
+            matched = set(map(id, tags))
+            tags = [tag for tag in tags if not any(id(parent) in matched for parent in tag.parents)]
+        for tag in tags:
+            if operation['action'] == 'replace_text':
+                changed = apply_replace_text(soup, tag, operation, editable_texts)
+            elif operation['action'] == 'set_attribute':
+                changed = apply_set_attribute(tag, operation)
+            else:
+                changed = apply_rewrite_href(tag, operation)
+            changes += changed
+
+    if not changes:
+        return {'file': file_path, 'changes': 0, 'diff': '', 'error': None}
+
+    new_content = render_html_content(soup, original_content, file_path)
+    diff = ''.join(difflib.unified_diff(
+        original_content.splitlines(keepends=True),
+        new_content.splitlines(keepends=True),
+        fromfile=f"a/{file_path}",
+        tofile=f"b/{file_path}",
+    ))
+    if not dry_run and new_content != original_content:
+        write_file_atomically(os.path.join(repo_path, file_path), new_content)
+    return {'file': file_path, 'changes': changes, 'diff': diff, 'error': None}
+
+
+def run_batch(repo_path, operations, dry_run=False, workers=None):
+    matched = match_files(repo_path, operations)
+    logger.info(f"Applying {len(operations)} operation(s) to {len(matched)} file(s)...")
+    results = []
+    with make_process_pool(workers) as executor:
+        futures = [executor.submit(apply_operations, repo_path, path, file_operations, dry_run) for path, file_operations in matched.items()]
+        for path, future in zip(matched, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # A bad selector or unreadable file only fails its own file
+                result = {'file': path, 'changes': 0, 'diff': '', 'error': str(e)}
+            if result['error']:
+                logger.error(f"{result['file']}: {result['error']}")
+            elif result['changes']:
+                logger.info(f"{result['file']}: {result['changes']} change(s)")
+            results.append(result)
+    return results
+
+
+def commit_results(repo_path, results, message, push):
+    changed_files = [result['file'] for result in results if result['changes'] and result['diff']]
+    if not changed_files:
+        logger.info("No files changed; nothing to commit.")
+        return False
+    try:
+        repo = git.Repo(repo_path)
+        repo.git.add('--', *changed_files)
+        repo.index.commit(message)
+        logger.info(f"Committed {len(changed_files)} file(s).")
+        if push:
+            push_changes(repo, None)
+            logger.info("Pushed changes.")
+        return True
+    except git.GitCommandError as e:
+        logger.error(f"Error committing batch edit: {e}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply selector-based edits across the site's HTML files.")
+    parser.add_argument('operations', help="JSON or YAML file with the list of operations")
+    parser.add_argument('--repo', default=LOCAL_REPO_PATH, help="path to the website repository")
+    parser.add_argument('--dry-run', action='store_true', help="print a unified diff instead of writing files")
+    parser.add_argument('--commit', metavar='MESSAGE', help="commit all changed files in one commit")
+    parser.add_argument('--push', action='store_true', help="push after committing (pulls first); requires --commit")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+    if args.push and not args.commit:
+        parser.error("--push requires --commit MESSAGE")
+
+    operations = load_operations(args.operations)
+    if args.push and not args.dry_run:
+        pull_latest_changes(args.repo, None)
+    results = run_batch(args.repo, operations, dry_run=args.dry_run, workers=args.workers)
+
+    changed = [result for result in results if result['changes'] and result['diff']]
+    if args.dry_run:
+        for result in changed:
+            sys.stdout.write(result['diff'])
+        logger.info(f"Dry run: {len(changed)} file(s) would change.")
+        return
+    logger.info(f"{len(changed)} file(s) changed.")
+    if args.commit:
+        commit_results(args.repo, results, args.commit, args.push)
+
+
+if __name__ == "__main__":
+    main()
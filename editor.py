@@ -7,17 +7,67 @@ import os
 import subprocess
 import sys
 import requests
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
 import git
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
-from PIL import Image, ImageTk
+from PIL import Image, ImageOps, ImageTk
 import logging
+import time
+import json
+import hashlib
+import queue
+import tempfile
+import shutil
+import threading
+import multiprocessing
+from html.parser import HTMLParser
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from importlib import metadata
+from site_build import build_site_files, build_summary, written_paths
+
+STARTUP_TIME = time.perf_counter()
 
 REPO_URL = 'https://github.com/dareaquatics/dare-website'
 LOCAL_REPO_PATH = 'dare-website'
 ASSET_DIR = 'assets/img/portfolio'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+# Local caches live next to the editor, outside the site repo
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.editor_cache')
+THUMBNAIL_SIZE = (200, 200)
+THUMBNAIL_CACHE_BUDGET = 50 * 1024 * 1024
+# Rows on each side of the selection whose thumbnails are generated ahead of time
+THUMBNAIL_PREFETCH = 3
+# Uploaded images are downscaled to fit these bounds and re-encoded without metadata
+IMAGE_MAX_DIMENSIONS = (1920, 1920)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+# Also write a .webp sibling next to every optimized upload
+IMAGE_WEBP_VARIANT = True
+# Minify published HTML/CSS/JS and write .gz/.br siblings (see site_build.py)
+BUILD_ON_PUBLISH = True
+# Perceptual hashes this many bits apart or fewer count as near-duplicates
+NEAR_DUPLICATE_DISTANCE = 5
+# Memory budget for parsed pages kept around between file switches
+PARSED_CACHE_BUDGET = 64 * 1024 * 1024
+# Rough in-memory size of a parsed tree per byte of source HTML
+PARSED_SIZE_FACTOR = 10
+# Index entries handed to the UI per progress update while a page is parsed in the background
+PARSE_CHUNK_SIZE = 200
+EDITABLE_TAGS = {'p', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+PREVIEW_LENGTH = 50
+# How often the Tk loop picks up results from the background git worker (ms)
+GIT_POLL_INTERVAL = 100
+# Records kept for re-filtering, lines kept in the widget, and ms between widget flushes
+CONSOLE_BUFFER_LINES = 5000
+CONSOLE_MAX_LINES = 1000
+CONSOLE_FLUSH_INTERVAL = 100
+COMMIT_PAGE_SIZE = 50
+# Commits on either side of the selection whose details are computed ahead of a click
+COMMIT_DETAILS_PREFETCH = 2
 
 # Configure logging for GUI console
 logging.basicConfig(level=logging.DEBUG)
@@ -31,14 +81,44 @@ class TextEditorApp(tk.Tk):
         self.soup = None
         self.current_file = None
         self.editable_texts = None
-        self.text_changed = False
+        self.links = []
+        self.document_cache = ParsedDocumentCache()
+        self.thumbnail_cache = ThumbnailCache()
+        self.search_index = None
+        self.directory_nodes = {}
+        self.directory_sizes = {}
+        self.commit_cache = CommitCache()
+        self.commit_entries = []
+        self.commit_history_loading = False
+        self.commit_history_exhausted = False
+        self.selected_commit = None
+        self.search_results = []
         self.original_html_content = None
+        # Edits, uploads and deletions wait here until they are published as one commit
+        self.pending_changes = []
+        self.dirty_documents = {}
+        self.publishing = []
+        self.journals = {}
+        self.git_worker = GitWorker()
+        # Parsing gets its own thread so opening a page never waits behind a clone or push
+        self.parse_worker = GitWorker(name='parse-worker')
+        # Link checks can take minutes on the network, so they never hold up publishing either
+        self.link_worker = GitWorker(name='link-worker')
+        self.parse_job = None
+        self.built_tabs = set()
+        self.startup_marks = []
 
         self.title("DARE Aquatics Website Editor")
         self.geometry("900x700")
 
         self.create_widgets()
-        self.init_repo()
+        self.mark_startup("widgets created")
+        self.after(GIT_POLL_INTERVAL, self.poll_git_worker)
+        # Let the window draw first; dependency checks and the clone follow
+        self.after_idle(self.init_repo)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bind('<Control-z>', self.undo_edit)
+        self.bind('<Control-y>', self.redo_edit)
 
     def create_widgets(self):
         self.file_label = ttk.Label(self, text="Select the HTML file:")
@@ -53,12 +133,68 @@ class TextEditorApp(tk.Tk):
 
         self.tabs = ttk.Notebook(self)
         self.tabs.grid(row=1, column=0, columnspan=3, pady=10, padx=10, sticky='nsew')
+        self.tabs.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+        # Tabs start as empty frames and are filled the first time they are shown
+        self.tab_builders = {}
+        self.text_tab = self.add_lazy_tab("Edit Text", self.build_text_tab)
+        self.image_tab = self.add_lazy_tab("Manage Images", self.build_image_tab)
+        self.link_tab = self.add_lazy_tab("Edit Links", self.build_link_tab)
+        self.search_tab = self.add_lazy_tab("Search Site", self.build_search_tab)
+        self.directory_tab = self.add_lazy_tab("Directory Overview", self.build_directory_tab)
+        self.styling_help_tab = self.add_lazy_tab("HTML Styling Help", self.build_styling_help_tab)
+        self.commit_history_tab = self.add_lazy_tab("Commit History", self.build_commit_history_tab)
 
-        self.text_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.text_tab, text="Edit Text")
+        self.console_frame = ttk.Frame(self)
+        self.console_frame.grid(row=2, column=0, columnspan=3, pady=10, padx=10, sticky='nsew')
+
+        self.console_log = scrolledtext.ScrolledText(self.console_frame, state='disabled', height=10, wrap=tk.WORD)
+        self.console_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        self.text_listbox = tk.Listbox(self.text_tab, height=15, width=80)
-        self.text_listbox.pack(pady=10)
+        self.console_scrollbar = ttk.Scrollbar(self.console_frame, orient=tk.VERTICAL, command=self.console_log.yview)
+        self.console_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.console_log.config(yscrollcommand=self.console_scrollbar.set)
+        self.console = ConsoleSink(self.console_log)
+
+        self.log_level_label = ttk.Label(self.console_frame, text="Log Level:")
+        self.log_level_label.pack(side=tk.LEFT, padx=5)
+
+        self.log_level_combobox = ttk.Combobox(self.console_frame, values=["DEBUG", "INFO", "WARNING", "ERROR"], state="readonly")
+        self.log_level_combobox.current(1)  # Default to INFO
+        self.log_level_combobox.pack(side=tk.LEFT, padx=5)
+        self.log_level_combobox.bind("<<ComboboxSelected>>", self.set_log_level)
+
+        self.cancel_git_button = ttk.Button(self.console_frame, text="Cancel Git Jobs", command=self.cancel_git_jobs)
+        self.cancel_git_button.pack(side=tk.LEFT, padx=5)
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+
+        # Building the first tab logs, so it waits until the console exists
+        self.on_tab_changed()
+
+    def add_lazy_tab(self, title, builder):
+        frame = ttk.Frame(self.tabs)
+        self.tabs.add(frame, text=title)
+        self.tab_builders[str(frame)] = (title, builder)
+        return frame
+
+    def on_tab_changed(self, event=None):
+        frame = self.tabs.select()
+        if frame and frame not in self.built_tabs:
+            title, builder = self.tab_builders[frame]
+            started = time.perf_counter()
+            self.built_tabs.add(frame)
+            builder()
+            self.log_message(f"Built {title} tab in {(time.perf_counter() - started) * 1000:.0f} ms", level=logging.DEBUG)
+
+    def tab_built(self, frame):
+        return str(frame) in self.built_tabs
+
+    def build_text_tab(self):
+        self.text_list = VirtualListView(self.text_tab, height=15, width=80)
+        self.text_list.pack(pady=10)
 
         self.edit_button = ttk.Button(self.text_tab, text="Edit Selected Text", command=self.edit_text_prompt)
         self.edit_button.pack(pady=10)
@@ -66,13 +202,21 @@ class TextEditorApp(tk.Tk):
         self.add_button = ttk.Button(self.text_tab, text="Add New Text", command=self.add_text_prompt)
         self.add_button.pack(pady=10)
 
+        self.undo_frame = ttk.Frame(self.text_tab)
+        self.undo_frame.pack(pady=5)
+        self.undo_edit_button = ttk.Button(self.undo_frame, text="Undo Edit", command=self.undo_edit)
+        self.undo_edit_button.pack(side=tk.LEFT, padx=5)
+        self.redo_edit_button = ttk.Button(self.undo_frame, text="Redo Edit", command=self.redo_edit)
+        self.redo_edit_button.pack(side=tk.LEFT, padx=5)
+
         self.commit_button = ttk.Button(self.text_tab, text="Commit Changes", command=self.commit_changes_prompt)
         self.commit_button.pack(pady=10)
-        self.commit_button.config(state=tk.DISABLED)
+        self.update_commit_buttons()
 
-        self.image_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.image_tab, text="Manage Images")
+        if self.editable_texts:
+            self.display_texts()
 
+    def build_image_tab(self):
         self.image_note_label = ttk.Label(self.image_tab, text="Images are from assets/img/portfolio")
         self.image_note_label.pack(pady=5)
 
@@ -82,81 +226,128 @@ class TextEditorApp(tk.Tk):
         self.delete_button = ttk.Button(self.image_tab, text="Delete Image", command=self.delete_image_prompt)
         self.delete_button.pack(pady=10)
 
-        self.image_listbox = tk.Listbox(self.image_tab, height=15, width=80)
-        self.image_listbox.pack(pady=10)
-        self.image_listbox.bind('<<ListboxSelect>>', self.preview_image)
+        self.duplicates_button = ttk.Button(self.image_tab, text="Find Duplicates", command=self.find_duplicates)
+        self.duplicates_button.pack(pady=10)
+
+        self.image_list = VirtualListView(self.image_tab, height=15, width=80, on_select=self.preview_image)
+        self.image_list.pack(pady=10)
 
         self.image_label = ttk.Label(self.image_tab)
         self.image_label.pack(pady=10)
 
         self.commit_image_button = ttk.Button(self.image_tab, text="Commit Changes", command=self.commit_changes_prompt)
         self.commit_image_button.pack(pady=10)
+        self.update_commit_buttons()
 
-        self.link_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.link_tab, text="Edit Links")
+        if os.path.exists(self.repo_path):
+            self.display_images()
 
-        self.link_listbox = tk.Listbox(self.link_tab, height=15, width=80)
-        self.link_listbox.pack(pady=10)
+    def build_link_tab(self):
+        self.link_list = VirtualListView(self.link_tab, height=15, width=80)
+        self.link_list.pack(pady=10)
 
         self.edit_link_button = ttk.Button(self.link_tab, text="Edit Selected Link", command=self.edit_link_prompt)
         self.edit_link_button.pack(pady=10)
 
         self.commit_link_button = ttk.Button(self.link_tab, text="Commit Link Changes", command=self.commit_changes_prompt)
         self.commit_link_button.pack(pady=10)
+        self.update_commit_buttons()
+
+        self.check_links_button = ttk.Button(self.link_tab, text="Check All Links", command=self.check_site_links)
+        self.check_links_button.pack(pady=10)
+
+        self.cancel_link_check_button = ttk.Button(self.link_tab, text="Cancel Link Check", command=self.cancel_link_check)
+        self.cancel_link_check_button.pack(pady=10)
+
+        self.broken_link_listbox = tk.Listbox(self.link_tab, height=8, width=80)
+        self.broken_link_listbox.pack(pady=10)
+        self.broken_link_listbox.bind('<Double-Button-1>', self.open_broken_link)
+        self.broken_links = []
+
+        if self.links:
+            self.display_links()
+
+    def build_search_tab(self):
+        self.search_frame = ttk.Frame(self.search_tab)
+        self.search_frame.pack(pady=10, fill=tk.X)
 
-        self.directory_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.directory_tab, text="Directory Overview")
+        self.search_entry = ttk.Entry(self.search_frame, width=50)
+        self.search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.search_entry.bind('<Return>', self.run_search)
 
-        self.directory_tree = scrolledtext.ScrolledText(self.directory_tab, wrap=tk.WORD, height=15)
-        self.directory_tree.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.search_mode = tk.StringVar(value='text')
+        ttk.Radiobutton(self.search_frame, text="Text", variable=self.search_mode, value='text').pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(self.search_frame, text="Links to", variable=self.search_mode, value='href').pack(side=tk.LEFT, padx=5)
+
+        self.search_button = ttk.Button(self.search_frame, text="Search", command=self.run_search)
+        self.search_button.pack(side=tk.LEFT, padx=5)
+
+        self.search_listbox = tk.Listbox(self.search_tab, height=15, width=80)
+        self.search_listbox.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.search_listbox.bind('<Double-Button-1>', self.open_search_result)
+
+    def build_directory_tab(self):
+        self.directory_frame = ttk.Frame(self.directory_tab)
+        self.directory_frame.pack(pady=10, fill=tk.BOTH, expand=True)
+
+        self.directory_tree = ttk.Treeview(self.directory_frame, columns=('size',), height=15)
+        self.directory_tree.heading('#0', text="Name")
+        self.directory_tree.heading('size', text="Size")
+        self.directory_tree.column('size', width=100, anchor='e', stretch=False)
+        self.directory_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.directory_tree.bind('<<TreeviewOpen>>', self.on_directory_open)
+
+        self.directory_scrollbar = ttk.Scrollbar(self.directory_frame, orient=tk.VERTICAL, command=self.directory_tree.yview)
+        self.directory_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.directory_tree.config(yscrollcommand=self.directory_scrollbar.set)
 
         self.update_button = ttk.Button(self.directory_tab, text="Update", command=self.update_directory_overview)
         self.update_button.pack(pady=5)
 
-        self.styling_help_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.styling_help_tab, text="HTML Styling Help")
+        if os.path.exists(self.repo_path):
+            self.update_directory_overview()
 
+    def build_styling_help_tab(self):
         self.styling_help_text = scrolledtext.ScrolledText(self.styling_help_tab, wrap=tk.WORD)
         self.styling_help_text.pack(fill=tk.BOTH, expand=True)
         self.populate_styling_help()
 
-        self.commit_history_tab = ttk.Frame(self.tabs)
-        self.tabs.add(self.commit_history_tab, text="Commit History")
+    def build_commit_history_tab(self):
+        self.commit_history_frame = ttk.Frame(self.commit_history_tab)
+        self.commit_history_frame.pack(pady=10)
 
-        self.commit_history_listbox = tk.Listbox(self.commit_history_tab, height=15, width=80)
-        self.commit_history_listbox.pack(pady=10)
+        self.commit_history_listbox = tk.Listbox(self.commit_history_frame, height=15, width=80, exportselection=False)
+        self.commit_history_listbox.pack(side=tk.LEFT)
         self.commit_history_listbox.bind('<<ListboxSelect>>', self.show_commit_details)
 
+        self.commit_history_scrollbar = ttk.Scrollbar(self.commit_history_frame, orient=tk.VERTICAL, command=self.commit_history_listbox.yview)
+        self.commit_history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.commit_history_listbox.config(yscrollcommand=self.on_commit_history_scroll)
+
         self.commit_details_text = scrolledtext.ScrolledText(self.commit_history_tab, wrap=tk.WORD)
         self.commit_details_text.pack(fill=tk.BOTH, expand=True)
 
-        self.console_frame = ttk.Frame(self)
-        self.console_frame.grid(row=2, column=0, columnspan=3, pady=10, padx=10, sticky='nsew')
-
-        self.console_log = scrolledtext.ScrolledText(self.console_frame, state='disabled', height=10, wrap=tk.WORD)
-        self.console_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        if os.path.exists(self.repo_path):
+            self.populate_commit_history()
 
-        self.console_scrollbar = ttk.Scrollbar(self.console_frame, orient=tk.VERTICAL, command=self.console_log.yview)
-        self.console_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.console_log.config(yscrollcommand=self.console_scrollbar.set)
+    def on_close(self):
+        self.thumbnail_cache.shutdown()
+        self.destroy()
 
-        self.log_level_label = ttk.Label(self.console_frame, text="Log Level:")
-        self.log_level_label.pack(side=tk.LEFT, padx=5)
-
-        self.log_level_combobox = ttk.Combobox(self.console_frame, values=["DEBUG", "INFO", "WARNING", "ERROR"], state="readonly")
-        self.log_level_combobox.current(1)  # Default to INFO
-        self.log_level_combobox.pack(side=tk.LEFT, padx=5)
-        self.log_level_combobox.bind("<<ComboboxSelected>>", self.set_log_level)
+    def mark_startup(self, label):
+        self.startup_marks.append((label, (time.perf_counter() - STARTUP_TIME) * 1000))
 
-        self.grid_rowconfigure(1, weight=1)
-        self.grid_rowconfigure(2, weight=1)
-        self.grid_columnconfigure(1, weight=1)
+    def report_startup(self):
+        report = ', '.join(f"{label} at {elapsed:.0f} ms" for label, elapsed in self.startup_marks)
+        self.log_message(f"Startup timing: {report}", level=logging.INFO)
 
     def set_log_level(self, event):
         selected_level = self.log_level_combobox.get()
         level = getattr(logging, selected_level, logging.INFO)
         logger.setLevel(level)
-        log_message(self.console_log, f"Log level set to {selected_level}", level=logging.INFO)
+        # Buffered records below the old level come back when the filter is lowered
+        self.console.set_level(level)
+        log_message(self.console, f"Log level set to {selected_level}", level=logging.INFO)
 
     def log_message(self, message, level=logging.INFO):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -169,40 +360,109 @@ class TextEditorApp(tk.Tk):
             logger.error(full_message)
         elif level == logging.DEBUG:
             logger.debug(full_message)
-        self.console_log.config(state='normal')
-        self.console_log.insert(tk.END, full_message + "\n")
-        self.console_log.config(state='disabled')
-        self.console_log.yview(tk.END)
+        self.console.write(level, full_message)
+
+    def poll_git_worker(self):
+        # Worker results are only ever applied to widgets here, on the Tk thread
+        try:
+            for worker in (self.git_worker, self.parse_worker, self.link_worker):
+                for kind, job, payload in worker.drain():
+                    try:
+                        self.apply_worker_result(kind, job, payload)
+                    except Exception as e:
+                        # One failing callback must not stall every result queued behind it
+                        self.log_message(f"Error handling result of {job.name}: {e}", level=logging.ERROR)
+        finally:
+            self.after(GIT_POLL_INTERVAL, self.poll_git_worker)
+
+    def apply_worker_result(self, kind, job, payload):
+        if kind == 'log':
+            self.console.write(*payload)
+        elif kind == 'progress':
+            # Chunks still queued from a job that was cancelled are dropped
+            if job.on_progress and not job.cancelled():
+                job.on_progress(payload)
+        elif kind == 'done':
+            if job.on_done:
+                job.on_done(payload)
+        elif kind == 'error':
+            self.log_message(f"{job.name} failed: {payload}", level=logging.ERROR)
+            if job.on_error:
+                job.on_error(payload)
+        elif kind == 'cancelled':
+            # Superseded jobs are routine; only explicit cancels deserve a warning
+            self.log_message(f"{job.name} cancelled.", level=logging.DEBUG if job.coalesce_key else logging.WARNING)
+            if job.on_cancelled:
+                job.on_cancelled(payload)
+
+    def cancel_git_jobs(self):
+        cancelled = self.git_worker.cancel_all() + self.parse_worker.cancel_all()
+        self.log_message(f"Requested cancellation of {cancelled} git job(s).", level=logging.WARNING)
 
     def update_directory_overview(self):
+        if not self.tab_built(self.directory_tab):
+            return
         try:
-            tree_output = self.generate_tree_view(self.repo_path)
-            self.directory_tree.config(state='normal')
-            self.directory_tree.delete(1.0, tk.END)
-            self.directory_tree.insert(tk.END, tree_output)
-            self.directory_tree.config(state='disabled')
+            # Only the top level is listed now; deeper levels load when expanded
+            self.directory_tree.delete(*self.directory_tree.get_children())
+            self.directory_nodes = {}
+            root = self.directory_tree.insert('', tk.END, text=f"{os.path.basename(os.path.normpath(self.repo_path))}/", values=(self.directory_size_text(''),), open=True)
+            self.directory_nodes[root] = ''
+            self.populate_directory(root, '')
+            self.git_worker.submit("Directory sizes", lambda job: get_file_index(self.repo_path).directory_sizes(), on_done=self.display_directory_sizes, coalesce_key='directory-sizes')
             self.log_message("Directory overview updated.", level=logging.INFO)
         except Exception as e:
             self.log_message(f"Error updating directory overview: {e}", level=logging.ERROR)
 
-    def generate_tree_view(self, startpath):
-        tree = []
-        for root, dirs, files in os.walk(startpath):
-            level = root.replace(startpath, '').count(os.sep)
-            indent = ' ' * 4 * (level)
-            tree.append(f"{indent}{os.path.basename(root)}/")
-            subindent = ' ' * 4 * (level + 1)
-            for f in files:
-                tree.append(f"{subindent}{f}")
-        return "\n".join(tree)
+    def populate_directory(self, node, directory):
+        self.directory_tree.delete(*self.directory_tree.get_children(node))
+        for name, path, is_dir, size in list_directory(self.repo_path, directory):
+            if is_dir:
+                child = self.directory_tree.insert(node, tk.END, text=f"{name}/", values=(self.directory_size_text(path),))
+                self.directory_nodes[child] = path
+                # Placeholder row so the expand arrow shows before the children are listed
+                self.directory_tree.insert(child, tk.END, text="...", tags=('placeholder',))
+            else:
+                self.directory_tree.insert(node, tk.END, text=name, values=(format_size(size),))
+
+    def on_directory_open(self, event=None):
+        node = self.directory_tree.focus()
+        children = self.directory_tree.get_children(node)
+        if len(children) == 1 and 'placeholder' in self.directory_tree.item(children[0], 'tags'):
+            directory = self.directory_nodes[node]
+            try:
+                self.populate_directory(node, directory)
+            except OSError as e:
+                self.log_message(f"Error listing {directory}: {e}", level=logging.ERROR)
+
+    def directory_size_text(self, directory):
+        size = self.directory_sizes.get(directory)
+        return format_size(size) if size is not None else "..."
+
+    def display_directory_sizes(self, sizes):
+        self.directory_sizes = sizes
+        if not self.tab_built(self.directory_tab):
+            return
+        for node, directory in self.directory_nodes.items():
+            if self.directory_tree.exists(node):
+                self.directory_tree.set(node, 'size', self.directory_size_text(directory))
 
     def init_repo(self):
-        clone_repo(REPO_URL, self.repo_path, self.console_log)
-        check_and_install_dependencies(self.console_log)
+        self.mark_startup("window shown")
+        check_and_install_dependencies(self.console)
+        self.mark_startup("dependencies checked")
+        self.git_worker.submit("Clone", lambda job: clone_repo(REPO_URL, self.repo_path, job), on_done=self.on_repo_ready)
+
+    def on_repo_ready(self, result=None):
         self.html_files = fetch_html_files(self.repo_path)
         self.populate_html_files_dropdown()
+        # Tabs that have not been opened yet skip these and load when first shown
         self.populate_commit_history()
         self.update_directory_overview()
+        self.display_images()
+        self.refresh_search_index()
+        self.mark_startup("repository ready")
+        self.report_startup()
 
     def populate_html_files_dropdown(self):
         self.file_dropdown.config(values=self.html_files)
@@ -210,41 +470,117 @@ class TextEditorApp(tk.Tk):
     def fetch_content(self, event=None):
         selected_file = self.file_dropdown.get()
         if selected_file:
-            self.current_file = selected_file
-            self.soup, self.original_html_content = fetch_html_content(self.repo_path, selected_file)
-            if self.soup:
-                self.editable_texts = list_editable_text(self.soup)
-                self.display_texts()
-                self.display_links()
-                self.display_images()
-                self.log_message(f"Loaded content from {selected_file}", level=logging.INFO)
-            else:
-                messagebox.showerror("Error", "Failed to fetch HTML content.")
+            if event is None and selected_file in self.dirty_documents:
+                if not messagebox.askyesno("Discard Changes", f"Discard unpublished edits to {selected_file}?"):
+                    return
+                self.discard_document_edits(selected_file)
+            # The Refetch button always rereads the file; switching files may hit the cache
+            if event is None:
+                self.document_cache.discard(self.repo_path, selected_file)
+            self.load_document(selected_file)
         else:
             messagebox.showwarning("Warning", "No HTML file selected.")
 
+    def load_document(self, file_path):
+        self.current_file = file_path
+        if self.parse_job:
+            # The user moved on; stop parsing the page they left
+            self.parse_job.cancel()
+            self.parse_job = None
+        # Files with unpublished edits keep their edited tree until published or undone
+        document = self.dirty_documents.get(file_path) or self.document_cache.get(self.repo_path, file_path)
+        if document:
+            self.show_document(file_path, document)
+            return
+
+        self.soup = None
+        self.original_html_content = None
+        self.editable_texts = {}
+        self.links = []
+        self.display_texts()
+        self.display_links()
+        self.log_message(f"Parsing {file_path}...", level=logging.INFO)
+        parse_job = self.parse_worker.submit(
+            f"Parse {file_path}",
+            lambda job: parse_document(self.repo_path, file_path, job),
+            on_done=lambda document: self.on_document_parsed(file_path, document),
+            coalesce_key='parse',
+            on_progress=self.on_parse_progress,
+            on_cancelled=lambda _: self.on_parse_stopped(parse_job),
+            on_error=lambda _: self.on_parse_stopped(parse_job),
+        )
+        self.parse_job = parse_job
+
+    def on_parse_progress(self, chunk):
+        editable_texts, links = chunk
+        self.editable_texts.update(editable_texts)
+        self.links.extend(links)
+        self.display_texts()
+        self.display_links()
+
+    def on_parse_stopped(self, job):
+        # Without this a cancelled or failed parse would leave the page reported as loading forever
+        if self.parse_job is job:
+            self.parse_job = None
+            self.log_message(f"Stopped parsing {self.current_file}; select it again to reload.", level=logging.WARNING)
+
+    def on_document_parsed(self, file_path, document):
+        if file_path != self.current_file:
+            # Finished just before the user switched away; keep the parse for later
+            if document:
+                self.document_cache.put(self.repo_path, file_path, document)
+            return
+        self.parse_job = None
+        if document is None:
+            messagebox.showerror("Error", "Failed to fetch HTML content.")
+            return
+        self.show_document(file_path, self.document_cache.put(self.repo_path, file_path, document))
+
+    def show_document(self, file_path, document):
+        self.soup = document['soup']
+        self.original_html_content = document['content']
+        self.editable_texts = document['editable_texts']
+        self.links = document['links']
+        if file_path not in self.dirty_documents:
+            self.recover_journal(file_path)
+        self.display_texts()
+        self.display_links()
+        self.log_message(f"Loaded content from {file_path}", level=logging.INFO)
+
+    def document_ready(self):
+        if self.parse_job:
+            messagebox.showinfo("Loading", f"{self.current_file} is still being parsed. Try again in a moment.")
+            return False
+        if self.soup is None:
+            messagebox.showwarning("Warning", "No HTML file loaded.")
+            return False
+        return True
+
     def display_texts(self):
-        self.text_listbox.delete(0, tk.END)
-        for i, text_info in self.editable_texts.items():
-            display_text = text_info['display_text']
-            self.text_listbox.insert(tk.END, f"{i}: {display_text}")
+        if not self.tab_built(self.text_tab):
+            return
+        # Keys stay stable across edits, so only edited rows change text
+        self.text_list.set_items([(i, f"{i}: {text_info['display_text']}") for i, text_info in self.editable_texts.items()])
 
     def display_links(self):
-        self.link_listbox.delete(0, tk.END)
-        for i, link in enumerate(self.soup.find_all('a', href=True)):
-            self.link_listbox.insert(tk.END, f"{i}: {link.get_text()[:50]} ({link['href']})")
+        if not self.tab_built(self.link_tab):
+            return
+        self.link_list.set_items([(i, f"{i}: {link['display_text']}") for i, link in enumerate(self.links)])
 
     def display_images(self):
-        self.image_listbox.delete(0, tk.END)
-        for root, _, files in os.walk(os.path.join(self.repo_path, ASSET_DIR)):
-            for file in files:
-                if file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-                    file_path = os.path.relpath(os.path.join(root, file), self.repo_path)
-                    self.image_listbox.insert(tk.END, file_path)
+        if not self.tab_built(self.image_tab):
+            return
+        pending_deletes = {path for change in self.pending_changes if change['kind'] == 'delete' for path in change['paths']}
+        image_files = [path for path in get_file_index(self.repo_path).files_under(ASSET_DIR, IMAGE_EXTENSIONS) if path not in pending_deletes]
+        self.image_list.set_items([(file_path, file_path) for file_path in image_files])
+        # Warm the thumbnail cache in the background so clicks only read small files
+        self.thumbnail_cache.prefetch([os.path.join(self.repo_path, file_path) for file_path in image_files])
 
     def edit_text_prompt(self):
+        if not self.document_ready():
+            return
         try:
-            selected_index = self.text_listbox.curselection()[0]
+            selected_index = self.text_list.selected_key()
             selected_text = self.editable_texts[selected_index]['tag'].decode_contents()
             edit_window = tk.Toplevel(self)
             edit_window.title("Edit Text")
@@ -258,13 +594,18 @@ class TextEditorApp(tk.Tk):
 
     def save_text(self, editor, text_id, window):
         new_text = editor.get("1.0", tk.END).strip()
-        self.soup = edit_text(self.soup, text_id, new_text, self.editable_texts)
+        tag = self.editable_texts[text_id]['tag']
+        old_fragment, path = str(tag), node_path(tag)
+        self.soup = edit_text(self.soup, text_id, new_text, self.editable_texts, self.links)
+        self.display_links()
+        self.document_cache.discard(self.repo_path, self.current_file)
         self.display_texts()
         window.destroy()
-        self.commit_button.config(state=tk.NORMAL)
-        self.text_changed = True
+        self.record_edit('replace', path, old_fragment, str(tag), "edit text")
 
     def add_text_prompt(self):
+        if not self.document_ready():
+            return
         add_window = tk.Toplevel(self)
         add_window.title("Add New Text")
         tag_label = ttk.Label(add_window, text="HTML Tag:")
@@ -280,17 +621,168 @@ class TextEditorApp(tk.Tk):
 
     def add_text(self, tag, text, window):
         if tag and text:
-            self.soup = add_text(self.soup, tag, text)
+            self.soup = add_text(self.soup, tag, text, self.editable_texts)
+            new_tag = self.soup.body.contents[-1]
+            self.document_cache.discard(self.repo_path, self.current_file)
             self.display_texts()
             window.destroy()
-            self.commit_button.config(state=tk.NORMAL)
-            self.text_changed = True
+            self.record_edit('insert', node_path(new_tag), None, str(new_tag), f"add <{tag}>")
         else:
             messagebox.showerror("Error", "Tag and text content cannot be empty.")
 
+    def journal_for(self, file_path):
+        if file_path not in self.journals:
+            self.journals[file_path] = EditJournal(self.repo_path, file_path, self.original_html_content)
+        return self.journals[file_path]
+
+    def record_edit(self, kind, path, old_fragment, new_fragment, label):
+        self.journal_for(self.current_file).record(kind, path, old_fragment, new_fragment, label)
+        self.stage_document_edit(label)
+
+    def typing_in_field(self, event):
+        # The shortcuts are bound on the window, so they also fire while a filter, search or edit box has focus
+        return event is not None and isinstance(event.widget, (tk.Entry, tk.Text))
+
+    def undo_edit(self, event=None):
+        if self.parse_job or self.typing_in_field(event):
+            return
+        journal = self.journals.get(self.current_file)
+        if not journal or not journal.can_undo():
+            self.log_message("Nothing to undo.", level=logging.INFO)
+            return
+        entry = journal.undo(self.soup, self.editable_texts, self.links)
+        self.document_cache.discard(self.repo_path, self.current_file)
+        change = self.pending_document_change(self.current_file)
+        if change:
+            change['edits'].pop()
+            if not change['edits']:
+                # Back to the file as it is on disk; the redo steps stay in the journal
+                self.pending_changes.remove(change)
+                self.dirty_documents.pop(self.current_file, None)
+        self.display_texts()
+        self.display_links()
+        self.update_commit_buttons()
+        self.log_message(f"Undid {entry['label']} in {self.current_file}", level=logging.INFO)
+
+    def redo_edit(self, event=None):
+        if self.parse_job or self.typing_in_field(event):
+            return
+        journal = self.journals.get(self.current_file)
+        if not journal or not journal.can_redo():
+            self.log_message("Nothing to redo.", level=logging.INFO)
+            return
+        entry = journal.redo(self.soup, self.editable_texts, self.links)
+        self.document_cache.discard(self.repo_path, self.current_file)
+        self.display_texts()
+        self.display_links()
+        self.stage_document_edit(entry['label'])
+        self.log_message(f"Redid {entry['label']} in {self.current_file}", level=logging.INFO)
+
+    def recover_journal(self, file_path):
+        journal = self.journals.get(file_path)
+        if journal and journal.base_hash != hashlib.sha256(self.original_html_content.encode('utf-8')).hexdigest():
+            # The file changed on disk (a pull, say), so leftover redo steps no longer apply
+            self.journals.pop(file_path).delete()
+            journal = None
+        journal = journal or EditJournal.load(self.repo_path, file_path, self.original_html_content)
+        if not journal or not journal.can_undo():
+            return
+        self.journals[file_path] = journal
+        if not messagebox.askyesno("Recover Edits", f"Recover {journal.position} unsaved edit(s) to {file_path} from the last session?"):
+            self.journals.pop(file_path).delete()
+            return
+        for entry in journal.entries[:journal.position]:
+            apply_journal_entry(self.soup, entry, 'redo', self.editable_texts, self.links)
+            self.stage_document_edit(entry['label'])
+        self.document_cache.discard(self.repo_path, file_path)
+        self.log_message(f"Recovered {journal.position} edit(s) to {file_path}", level=logging.INFO)
+
+    def stage_document_edit(self, label):
+        self.dirty_documents[self.current_file] = {
+            'soup': self.soup,
+            'content': self.original_html_content,
+            'editable_texts': self.editable_texts,
+            'links': self.links,
+        }
+        change = self.pending_document_change(self.current_file)
+        if change:
+            change['edits'].append(label)
+        else:
+            self.pending_changes.append({'kind': 'document', 'file': self.current_file, 'edits': [label], 'saved': False})
+        self.update_commit_buttons()
+
+    def is_publishing(self, change):
+        return any(change is published for published in self.publishing)
+
+    def pending_document_change(self, file_path):
+        # Edits made while a publish is in flight start a new change instead of joining the one being committed
+        for change in self.pending_changes:
+            if change['kind'] == 'document' and change['file'] == file_path and not self.is_publishing(change):
+                return change
+        return None
+
+    def update_commit_buttons(self):
+        state = tk.NORMAL if self.pending_changes else tk.DISABLED
+        for frame, button_name in ((self.text_tab, 'commit_button'), (self.image_tab, 'commit_image_button'), (self.link_tab, 'commit_link_button')):
+            if self.tab_built(frame) and hasattr(self, button_name):
+                getattr(self, button_name).config(state=state)
+
+    def describe_change(self, change):
+        if change['kind'] == 'document':
+            return f"{change['file']}: {len(change['edits'])} edit(s) ({', '.join(change['edits'][-3:])})"
+        if change['kind'] == 'upload':
+            return f"Upload {', '.join(change['paths'])}"
+        return f"Delete {', '.join(change['paths'])}"
+
+    def discard_document_edits(self, file_path):
+        self.dirty_documents.pop(file_path, None)
+        self.document_cache.discard(self.repo_path, file_path)
+        journal = self.journals.pop(file_path, None)
+        if journal:
+            journal.delete()
+
+    def undo_change(self, change):
+        if change['kind'] == 'document':
+            self.discard_document_edits(change['file'])
+            if change['saved']:
+                # Already written by a publish that failed; restore the committed version
+                git.Repo(self.repo_path).git.checkout('--', change['file'])
+            if change['file'] == self.current_file:
+                self.load_document(change['file'])
+        elif change['kind'] == 'upload':
+            repo = git.Repo(self.repo_path)
+            tracked = set(repo.git.ls_files('--', *change['paths']).splitlines())
+            for path in change['paths']:
+                full_path = os.path.join(self.repo_path, path)
+                if path in tracked:
+                    # Never delete a committed file; put the committed version back instead
+                    repo.git.checkout('--', path)
+                elif os.path.exists(full_path):
+                    os.remove(full_path)
+        self.pending_changes.remove(change)
+        self.log_message(f"Undid pending change: {self.describe_change(change)}", level=logging.INFO)
+        self.display_images()
+        self.update_commit_buttons()
+
+    def undo_selected_change(self, listbox):
+        try:
+            selected_index = listbox.curselection()[0]
+            self.undo_change(self.pending_changes[selected_index])
+            listbox.delete(selected_index)
+        except IndexError:
+            messagebox.showwarning("Warning", "No pending change selected.")
+
     def commit_changes_prompt(self):
         commit_window = tk.Toplevel(self)
         commit_window.title("Commit Changes")
+        pending_label = ttk.Label(commit_window, text="Pending Changes:")
+        pending_label.pack(pady=5)
+        pending_listbox = tk.Listbox(commit_window, height=8, width=80)
+        pending_listbox.pack(pady=5)
+        for change in self.pending_changes:
+            pending_listbox.insert(tk.END, self.describe_change(change))
+        undo_button = ttk.Button(commit_window, text="Undo Selected", command=lambda: self.undo_selected_change(pending_listbox))
+        undo_button.pack(pady=5)
         commit_message_label = ttk.Label(commit_window, text="Commit Message:")
         commit_message_label.pack(pady=5)
         commit_message_entry = ttk.Entry(commit_window, width=50)
@@ -303,53 +795,125 @@ class TextEditorApp(tk.Tk):
         commit_button.pack(pady=10)
 
     def commit_changes(self, message, description, window):
-        if message:
-            if self.text_changed:
-                if not save_html_content(os.path.join(self.repo_path, self.current_file), self.soup, self.original_html_content):
-                    messagebox.showerror("Error", "Failed to save changes.")
+        if not message:
+            messagebox.showerror("Error", "Commit message cannot be empty.")
+            return
+        if not self.pending_changes:
+            messagebox.showwarning("Warning", "There are no pending changes to commit.")
+            return
+
+        for change in self.pending_changes:
+            if change['kind'] == 'document' and change['file'] in self.dirty_documents:
+                document = self.dirty_documents[change['file']]
+                if not save_html_content(os.path.join(self.repo_path, change['file']), document['soup'], document['content']):
+                    messagebox.showerror("Error", f"Failed to save changes to {change['file']}.")
                     return
-            commit_changes(self.repo_path, message, description, self.console_log)
-            window.destroy()
+                change['saved'] = True
+                self.discard_document_edits(change['file'])
+        if self.current_file and any(change['kind'] == 'document' and change['file'] == self.current_file for change in self.pending_changes):
+            # Source positions are stale once the file is rewritten, so reparse it
+            self.load_document(self.current_file)
+
+        add_paths = [change['file'] for change in self.pending_changes if change['kind'] == 'document']
+        add_paths += [path for change in self.pending_changes if change['kind'] == 'upload' for path in change['paths']]
+        remove_paths = [path for change in self.pending_changes if change['kind'] == 'delete' for path in change['paths']]
+        self.publishing = list(self.pending_changes)
+        self.git_worker.submit("Publish", lambda job: publish_changes(self.repo_path, message, description, add_paths, remove_paths, job), on_done=self.on_commit_done)
+        window.destroy()
+        self.log_message(f"Publishing {len(self.publishing)} pending change(s) as one commit...", level=logging.INFO)
+
+    def on_commit_done(self, committed):
+        if committed:
+            self.pending_changes = [change for change in self.pending_changes if not self.is_publishing(change)]
             messagebox.showinfo("Success", "Changes committed successfully.")
-            self.commit_button.config(state=tk.DISABLED)
-            self.text_changed = False
+            if BUILD_ON_PUBLISH and self.current_file and self.current_file not in self.dirty_documents:
+                # The build may have rewritten the open page on disk
+                self.load_document(self.current_file)
         else:
-            messagebox.showerror("Error", "Commit message cannot be empty.")
+            messagebox.showerror("Error", "Failed to commit changes. See the console for details.")
+        self.publishing = []
+        self.update_commit_buttons()
+        self.display_images()
         self.populate_commit_history()
+        self.refresh_search_index()
 
     def upload_image_prompt(self):
-        file_path = filedialog.askopenfilename()
-        if file_path:
-            upload_image(self.repo_path, file_path, ASSET_DIR, self.console_log)
-            self.display_images()
+        file_paths = filedialog.askopenfilenames(filetypes=[("Images", " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)), ("All files", "*")])
+        if file_paths:
+            self.git_worker.submit("Prepare images", lambda job: stage_images(self.repo_path, list(file_paths), ASSET_DIR, job), on_done=self.on_images_staged)
 
     def delete_image_prompt(self):
         try:
-            selected_index = self.image_listbox.curselection()[0]
-            file_path = self.image_listbox.get(selected_index)
+            file_path = self.image_list.selected_key()
             confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {file_path}?")
             if confirm:
-                delete_image(self.repo_path, file_path, self.console_log)
+                upload = next((change for change in self.pending_changes if change['kind'] == 'upload' and file_path in change['paths'] and not self.is_publishing(change)), None)
+                if upload:
+                    # Never published, so dropping the upload is the whole deletion
+                    self.undo_change(upload)
+                    return
+                # The .webp written next to an upload goes with it
+                paths = [file_path] + [path for path in [webp_sibling(file_path)] if path and get_file_index(self.repo_path).contains(path)]
+                self.pending_changes.append({'kind': 'delete', 'paths': paths})
+                self.log_message(f"Staged deletion of {', '.join(paths)}", level=logging.INFO)
                 self.display_images()
+                self.update_commit_buttons()
         except IndexError:
             messagebox.showwarning("Warning", "No image selected.")
 
-    def preview_image(self, event):
+    def find_duplicates(self):
+        self.git_worker.submit("Find duplicates", lambda job: duplicate_report(ImageIndex(self.repo_path), job), on_done=self.show_duplicates)
+
+    def show_duplicates(self, report):
+        report_window = tk.Toplevel(self)
+        report_window.title("Duplicate Images")
+        report_text = scrolledtext.ScrolledText(report_window, wrap=tk.WORD, width=100, height=30)
+        report_text.pack(fill=tk.BOTH, expand=True)
+        report_text.insert(tk.END, report)
+        report_text.config(state=tk.DISABLED)
+
+    def on_images_staged(self, results):
+        for result in results:
+            paths = [os.path.relpath(path, self.repo_path).replace(os.sep, '/') for path in result['outputs']]
+            self.pending_changes.append({'kind': 'upload', 'paths': paths})
+        self.display_images()
+        self.update_commit_buttons()
+
+    def preview_image(self, selected_path):
         try:
-            selected_index = self.image_listbox.curselection()[0]
-            file_path = os.path.join(self.repo_path, self.image_listbox.get(selected_index))
-            image = Image.open(file_path)
-            image.thumbnail((200, 200))
-            photo = ImageTk.PhotoImage(image)
+            file_path = os.path.join(self.repo_path, selected_path)
+            neighbours = self.image_list.keys_around(selected_path, THUMBNAIL_PREFETCH)
+            # Queue the selected image first, then the rows around it
+            self.thumbnail_cache.prefetch([file_path] + [os.path.join(self.repo_path, path) for path in neighbours])
+            self.show_thumbnail(file_path)
+        except Exception as e:
+            self.log_message(f"Error previewing image: {e}", level=logging.ERROR)
+
+    def show_thumbnail(self, file_path, attempts=0):
+        selected_path = self.image_list.selected
+        if selected_path is None or os.path.join(self.repo_path, selected_path) != file_path:
+            return
+        thumbnail_path = self.thumbnail_cache.get(file_path)
+        if thumbnail_path is None:
+            # Still being generated; check again shortly
+            if attempts < 100:
+                self.after(50, lambda: self.show_thumbnail(file_path, attempts + 1))
+            else:
+                self.log_message(f"Timed out generating thumbnail for {file_path}", level=logging.WARNING)
+            return
+        try:
+            photo = ImageTk.PhotoImage(Image.open(thumbnail_path))
             self.image_label.config(image=photo)
             self.image_label.image = photo
         except Exception as e:
             self.log_message(f"Error previewing image: {e}", level=logging.ERROR)
 
     def edit_link_prompt(self):
+        if not self.document_ready():
+            return
         try:
-            selected_index = self.link_listbox.curselection()[0]
-            link_tag = self.soup.find_all('a', href=True)[selected_index]
+            selected_index = self.link_list.selected_key()
+            link_tag = self.links[selected_index]['tag']
             current_text = link_tag.get_text()
             current_href = link_tag['href']
             edit_window = tk.Toplevel(self)
@@ -364,21 +928,59 @@ class TextEditorApp(tk.Tk):
             href_entry = ttk.Entry(edit_window, width=50)
             href_entry.pack(pady=5)
             href_entry.insert(tk.END, current_href)
-            save_button = ttk.Button(edit_window, text="Save", command=lambda: self.save_link(link_tag, text_entry.get(), href_entry.get(), edit_window))
+            save_button = ttk.Button(edit_window, text="Save", command=lambda: self.save_link(selected_index, text_entry.get(), href_entry.get(), edit_window))
             save_button.pack(pady=10)
         except IndexError:
             messagebox.showwarning("Warning", "No link selected.")
 
-    def save_link(self, link_tag, new_text, new_href, window):
+    def check_site_links(self):
+        from link_checker import check_links
+        self.log_message("Checking links across the site...", level=logging.INFO)
+        self.link_worker.submit("Link check", lambda job: check_links(self.repo_path, job=job), on_done=self.display_link_check, coalesce_key='link-check', on_cancelled=self.on_link_check_cancelled)
+
+    def cancel_link_check(self):
+        if self.link_worker.cancel_all():
+            self.log_message("Requested cancellation of the link check.", level=logging.WARNING)
+
+    def on_link_check_cancelled(self, results):
+        # A check cancelled before it started has nothing to show
+        if results is not None:
+            self.display_link_check(results)
+
+    def display_link_check(self, results):
+        from link_checker import format_link_result, link_check_summary
+        # Links a cancelled check never reached are listed too
+        self.broken_links = [result for result in results if not result['ok']]
+        self.broken_link_listbox.delete(0, tk.END)
+        for result in self.broken_links:
+            self.broken_link_listbox.insert(tk.END, format_link_result(result))
+        self.log_message(f"Checked {len(results)} link(s); {link_check_summary(results)}.", level=logging.WARNING if self.broken_links else logging.INFO)
+
+    def open_broken_link(self, event=None):
+        selection = self.broken_link_listbox.curselection()
+        if not selection:
+            return
+        file_path = self.broken_links[selection[0]]['file']
+        if file_path in self.html_files:
+            self.file_dropdown.set(file_path)
+        self.load_document(file_path)
+
+    def save_link(self, link_id, new_text, new_href, window):
         try:
+            link_tag = self.links[link_id]['tag']
+            old_fragment, path = str(link_tag), node_path(link_tag)
             if new_text != link_tag.get_text():
                 link_tag.string.replace_with(new_text)
             if new_href != link_tag['href']:
                 link_tag['href'] = new_href
+            record_source_patch(link_tag)
+            self.links[link_id]['display_text'] = link_display_text(link_tag)
+            refresh_text_previews(link_tag, self.editable_texts)
+            self.display_texts()
+            self.document_cache.discard(self.repo_path, self.current_file)
             self.display_links()
             window.destroy()
-            self.commit_button.config(state=tk.NORMAL)
-            self.text_changed = True
+            self.record_edit('replace', path, old_fragment, str(link_tag), "edit link")
         except Exception as e:
             self.log_message(f"Error saving link: {e}", level=logging.ERROR)
             messagebox.showerror("Error", f"Failed to save link: {e}")
@@ -395,36 +997,501 @@ class TextEditorApp(tk.Tk):
         self.styling_help_text.insert(tk.END, styling_help_content)
         self.styling_help_text.config(state=tk.DISABLED)
 
+    def refresh_search_index(self):
+        # Only files whose mtime changed since the last run are reparsed
+        from site_search import SearchIndex
+        self.git_worker.submit("Search index", lambda job: SearchIndex(self.repo_path).update(), on_done=self.on_search_index_ready, coalesce_key='search-index')
+
+    def on_search_index_ready(self, search_index):
+        self.search_index = search_index
+        self.log_message(f"Search index ready ({len(search_index.files)} files, {len(search_index.tokens)} words).", level=logging.DEBUG)
+
+    def run_search(self, event=None):
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        if self.search_index is None:
+            messagebox.showinfo("Search", "The search index is still being built. Try again in a moment.")
+            return
+        if self.search_mode.get() == 'href':
+            self.search_results = self.search_index.search_href(query)
+        else:
+            self.search_results = self.search_index.search(query)
+        self.search_listbox.delete(0, tk.END)
+        for result in self.search_results:
+            self.search_listbox.insert(tk.END, f"{result['file']}:{result['line']} <{result['tag']}> {result['preview']}")
+        self.log_message(f"Search for '{query}' found {len(self.search_results)} result(s).", level=logging.INFO)
+
+    def open_search_result(self, event=None):
+        selection = self.search_listbox.curselection()
+        if not selection:
+            return
+        file_path = self.search_results[selection[0]]['file']
+        if file_path in self.html_files:
+            self.file_dropdown.set(file_path)
+        self.load_document(file_path)
+
     def populate_commit_history(self):
-        self.commit_history_listbox.delete(0, tk.END)
-        repo = git.Repo(self.repo_path)
-        branch = 'main'
-        commits = list(repo.iter_commits(branch, max_count=10))
-        for commit in commits:
-            self.commit_history_listbox.insert(tk.END, f"{commit.hexsha[:7]} - {commit.message.splitlines()[0]}")
+        if not self.tab_built(self.commit_history_tab):
+            return
+        if not self.commit_entries:
+            self.load_commit_page()
+            return
+        # After a commit or pull only the commits above the newest loaded one are fetched
+        known_head = self.commit_entries[0]['sha']
+        self.git_worker.submit("Commit history", lambda job: fetch_new_commits(self.repo_path, known_head, self.commit_cache), on_done=self.prepend_commit_history, coalesce_key='history')
+
+    def load_commit_page(self):
+        if self.commit_history_loading or self.commit_history_exhausted:
+            return
+        self.commit_history_loading = True
+        skip = len(self.commit_entries)
+        self.git_worker.submit("Commit history", lambda job: fetch_commit_history(self.repo_path, skip=skip, cache=self.commit_cache), on_done=self.append_commit_history, on_cancelled=self.reset_commit_history_loading, on_error=self.reset_commit_history_loading)
+
+    def reset_commit_history_loading(self, _):
+        # A failed or cancelled page must not block paging for good; scrolling retries it
+        self.commit_history_loading = False
+
+    def on_commit_history_scroll(self, first, last):
+        self.commit_history_scrollbar.set(first, last)
+        # Page further back once the user nears the bottom of what is loaded
+        if float(last) >= 0.9:
+            self.load_commit_page()
+
+    def append_commit_history(self, entries):
+        self.commit_history_loading = False
+        if len(entries) < COMMIT_PAGE_SIZE:
+            self.commit_history_exhausted = True
+        self.commit_entries.extend(entries)
+        for entry in entries:
+            self.commit_history_listbox.insert(tk.END, format_commit_entry(entry))
+
+    def prepend_commit_history(self, entries):
+        if entries is None:
+            # History was rewritten under us; start over from the top
+            self.commit_entries = []
+            self.commit_history_exhausted = False
+            self.commit_history_listbox.delete(0, tk.END)
+            self.load_commit_page()
+            return
+        self.commit_entries[:0] = entries
+        for i, entry in enumerate(entries):
+            self.commit_history_listbox.insert(i, format_commit_entry(entry))
 
     def show_commit_details(self, event):
         try:
             selected_index = self.commit_history_listbox.curselection()[0]
-            commit_hash = self.commit_history_listbox.get(selected_index).split(" ")[0]
-            repo = git.Repo(self.repo_path)
-            commit = repo.commit(commit_hash)
-            commit_details = f"""
-            Commit ID: {commit.hexsha}
-            Author: {commit.author}
-            Date: {commit.committed_datetime}
-            Message: {commit.message}
-            Files Changed:
-            """
-            for diff in commit.diff(commit.parents[0]):
-                commit_details += f"\n{diff.a_path} ({diff.change_type})"
-            self.commit_details_text.config(state=tk.NORMAL)
-            self.commit_details_text.delete(1.0, tk.END)
-            self.commit_details_text.insert(tk.END, commit_details)
-            self.commit_details_text.config(state=tk.DISABLED)
+            commit_hash = self.commit_entries[selected_index]['sha']
+            self.selected_commit = commit_hash
+            neighbours = self.commit_entries[max(0, selected_index - COMMIT_DETAILS_PREFETCH):selected_index + COMMIT_DETAILS_PREFETCH + 1]
+            cached = self.commit_cache.details(commit_hash)
+            if cached:
+                self.display_commit_details(cached)
+            else:
+                self.git_worker.submit("Commit details", lambda job: fetch_commit_details(self.repo_path, commit_hash, self.commit_cache), on_done=self.display_commit_details, coalesce_key='details')
+            # Diffs for the rows around the selection are computed while the user reads this one
+            shas = [entry['sha'] for entry in neighbours if entry['sha'] != commit_hash]
+            self.git_worker.submit("Prefetch commit details", lambda job: prefetch_commit_details(self.repo_path, shas, self.commit_cache, job), coalesce_key='details-prefetch')
         except IndexError:
             messagebox.showwarning("Warning", "No commit selected.")
 
+    def display_commit_details(self, details):
+        if details['sha'] != self.selected_commit:
+            return
+        self.commit_details_text.config(state=tk.NORMAL)
+        self.commit_details_text.delete(1.0, tk.END)
+        self.commit_details_text.insert(tk.END, format_commit_details(details))
+        self.commit_details_text.config(state=tk.DISABLED)
+
+class CommitCache:
+    # Commits never change, so their metadata and diff stats are kept by SHA across sessions
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_path = os.path.join(cache_dir, 'commit_cache.json')
+        self.lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable commit cache: {e}")
+
+    def metadata(self, commit):
+        with self.lock:
+            entry = self.entries.get(commit.hexsha)
+            if entry is None:
+                entry = {
+                    'sha': commit.hexsha,
+                    'summary': commit.message.splitlines()[0] if commit.message else '',
+                    'message': commit.message,
+                    'author': str(commit.author),
+                    'date': commit.committed_datetime.isoformat(),
+                }
+                self.entries[commit.hexsha] = entry
+            return entry
+
+    def details(self, sha):
+        with self.lock:
+            entry = self.entries.get(sha)
+            return entry if entry and 'files' in entry else None
+
+    def store_files(self, sha, files):
+        with self.lock:
+            self.entries[sha]['files'] = files
+            return self.entries[sha]
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries)
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(data)
+        os.replace(tmp_path, self.cache_path)
+
+class SubstringIndex:
+    # Trigram postings, so filtering only verifies candidate rows instead of scanning every one
+    def __init__(self):
+        self.texts = {}
+        self.trigrams = {}
+
+    def set(self, key, text):
+        text = text.lower()
+        if self.texts.get(key) == text:
+            return
+        self.remove(key)
+        self.texts[key] = text
+        for gram in trigrams(text):
+            self.trigrams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        for gram in trigrams(text):
+            keys = self.trigrams.get(gram)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.trigrams[gram]
+
+    def candidates(self, query):
+        # None means the query is too short to narrow anything down
+        grams = trigrams(query)
+        if not grams:
+            return None
+        postings = sorted((self.trigrams.get(gram, set()) for gram in grams), key=len)
+        return postings[0].intersection(*postings[1:])
+
+class VirtualListView(ttk.Frame):
+    # A Listbox that only ever holds the visible rows; scrolling and filtering swap their text in place
+    def __init__(self, parent, height=15, width=80, on_select=None):
+        super().__init__(parent)
+        self.rows = height
+        self.on_select = on_select
+        self.keys = []
+        self.positions = {}
+        self.texts = {}
+        self.index = SubstringIndex()
+        self.filtered = []
+        self.filter_text = ''
+        self.top = 0
+        self.rendered = []
+        self.rendered_keys = []
+        self.selected = None
+
+        self.filter_frame = ttk.Frame(self)
+        self.filter_frame.pack(fill=tk.X)
+        ttk.Label(self.filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(self.filter_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.filter_var.trace_add('write', self.on_filter_changed)
+
+        self.body = ttk.Frame(self)
+        self.body.pack(fill=tk.X)
+        self.listbox = tk.Listbox(self.body, height=height, width=width, exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.scrollbar = ttk.Scrollbar(self.body, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind('<<ListboxSelect>>', self.on_listbox_select)
+        self.listbox.bind('<MouseWheel>', lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+        self.listbox.bind('<Up>', lambda event: self.move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self.move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self.move_selection(-self.rows))
+        self.listbox.bind('<Next>', lambda event: self.move_selection(self.rows))
+
+    def set_items(self, items):
+        texts = dict(items)
+        for key in self.texts.keys() - texts.keys():
+            self.index.remove(key)
+        for key, text in items:
+            if self.texts.get(key) != text:
+                self.index.set(key, text)
+        self.keys = [key for key, _ in items]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.texts = texts
+        if self.selected not in texts:
+            self.selected = None
+        self.apply_filter(self.filter_text)
+
+    def on_filter_changed(self, *args):
+        query = self.filter_var.get().lower()
+        # Typing more characters can only narrow the rows that already matched
+        previous = self.filtered if self.filter_text and query.startswith(self.filter_text) else None
+        self.top = 0
+        self.apply_filter(query, previous)
+
+    def apply_filter(self, query, previous=None):
+        if not query:
+            self.filtered = list(self.keys)
+        else:
+            if previous is not None:
+                pool = previous
+            else:
+                candidates = self.index.candidates(query)
+                pool = self.keys if candidates is None else sorted(candidates, key=self.positions.get)
+            self.filtered = [key for key in pool if query in self.index.texts[key]]
+        self.filter_text = query
+        self.set_top(self.top)
+
+    def set_top(self, top):
+        top = max(0, min(top, len(self.filtered) - self.rows))
+        shift = top - self.top
+        # Reuse rows that stay on screen so a short scroll only touches the rows entering view
+        if 0 < shift < len(self.rendered):
+            self.listbox.delete(0, shift - 1)
+            del self.rendered[:shift]
+        elif 0 < -shift < self.rows and self.rendered:
+            self.listbox.insert(0, *[''] * -shift)
+            self.rendered[:0] = [None] * -shift
+        self.top = top
+        self.render()
+
+    def render(self):
+        keys = self.filtered[self.top:self.top + self.rows]
+        texts = [self.texts[key] for key in keys]
+        for i, text in enumerate(texts):
+            if i >= len(self.rendered):
+                self.listbox.insert(tk.END, text)
+            elif self.rendered[i] != text:
+                self.listbox.delete(i)
+                self.listbox.insert(i, text)
+        if len(self.rendered) > len(texts):
+            self.listbox.delete(len(texts), tk.END)
+        self.rendered = texts
+        self.rendered_keys = keys
+
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected in keys:
+            self.listbox.selection_set(keys.index(self.selected))
+        total = len(self.filtered)
+        if total > self.rows:
+            self.scrollbar.set(self.top / total, (self.top + self.rows) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.set_top(int(float(args[1]) * len(self.filtered)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.scroll(amount * self.rows if args[2] == 'pages' else amount)
+
+    def scroll(self, amount):
+        self.set_top(self.top + amount)
+        return 'break'
+
+    def move_selection(self, step):
+        if not self.filtered:
+            return 'break'
+        position = self.filtered.index(self.selected) + step if self.selected in self.filtered else 0
+        self.select(self.filtered[max(0, min(position, len(self.filtered) - 1))])
+        return 'break'
+
+    def select(self, key, notify=True):
+        self.selected = key
+        if key in self.filtered:
+            position = self.filtered.index(key)
+            if position < self.top:
+                self.set_top(position)
+            elif position >= self.top + self.rows:
+                self.set_top(position - self.rows + 1)
+            else:
+                self.render()
+        if notify and self.on_select:
+            self.on_select(key)
+
+    def on_listbox_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection and selection[0] < len(self.rendered_keys):
+            key = self.rendered_keys[selection[0]]
+            if key != self.selected:
+                self.selected = key
+                if self.on_select:
+                    self.on_select(key)
+
+    def selected_key(self):
+        # Raises like curselection()[0] does when nothing is selected
+        if self.selected is None:
+            raise IndexError("No row selected")
+        return self.selected
+
+    def keys_around(self, key, distance):
+        if key not in self.filtered:
+            return []
+        position = self.filtered.index(key)
+        return self.filtered[max(0, position - distance):position + distance + 1]
+
+class GitJob:
+    def __init__(self, worker, name, func, on_done=None, coalesce_key=None, on_progress=None, on_cancelled=None, on_error=None):
+        self.worker = worker
+        self.name = name
+        self.func = func
+        self.on_done = on_done
+        self.coalesce_key = coalesce_key
+        self.on_progress = on_progress
+        # Gets whatever a cancelled job still returned (None if it never ran), so callers can show partial results or reset state
+        self.on_cancelled = on_cancelled
+        self.on_error = on_error
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def write(self, level, full_message):
+        # Lines are handed to the Tk thread instead of touching the widget
+        self.worker.results.put(('log', self, (level, full_message)))
+
+    def progress(self, payload):
+        self.worker.results.put(('progress', self, payload))
+
+class ConsoleSink:
+    # Buffers console lines and writes them to the widget in one batch per timer tick
+    def __init__(self, widget, level=logging.INFO):
+        self.widget = widget
+        self.level = level
+        self.records = deque(maxlen=CONSOLE_BUFFER_LINES)
+        self.pending = deque(maxlen=CONSOLE_MAX_LINES)
+        self.widget.after(CONSOLE_FLUSH_INTERVAL, self.flush)
+
+    def write(self, level, full_message):
+        self.records.append((level, full_message))
+        if level >= self.level:
+            self.pending.append(full_message)
+
+    def flush(self):
+        if self.pending:
+            lines = list(self.pending)
+            self.pending.clear()
+            self.show(lines)
+        self.widget.after(CONSOLE_FLUSH_INTERVAL, self.flush)
+
+    def show(self, lines):
+        # Only follow new output if the user has not scrolled up to read something
+        at_bottom = self.widget.yview()[1] >= 1.0
+        self.widget.config(state='normal')
+        self.widget.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.widget.index('end-1c').split('.')[0]) - 1 - CONSOLE_MAX_LINES
+        if excess > 0:
+            self.widget.delete('1.0', f"{excess + 1}.0")
+        self.widget.config(state='disabled')
+        if at_bottom:
+            self.widget.yview(tk.END)
+
+    def set_level(self, level):
+        self.level = level
+        self.pending.clear()
+        self.widget.config(state='normal')
+        self.widget.delete('1.0', tk.END)
+        self.widget.config(state='disabled')
+        lines = [full_message for record_level, full_message in self.records if record_level >= level]
+        if lines:
+            self.show(lines[-CONSOLE_MAX_LINES:])
+
+class JobProgress(git.RemoteProgress):
+    # Forwards clone/push progress to the console roughly every 10%
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.last_reported = {}
+
+    def update(self, op_code, cur_count, max_count=None, message=''):
+        if not max_count:
+            return
+        stage = op_code & self.OP_MASK
+        percent = int(cur_count * 100 / max_count)
+        if percent - self.last_reported.get(stage, -10) >= 10 or percent == 100:
+            self.last_reported[stage] = percent
+            log_message(self.job, f"{self.job.name}: {percent}% {message}".strip(), level=logging.DEBUG)
+
+class GitWorker:
+    # Runs git and network work on one background thread; the Tk side polls drain()
+    def __init__(self, name='git-worker'):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.queued = {}
+        self.current = None
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, name, func, on_done=None, coalesce_key=None, on_progress=None, on_cancelled=None, on_error=None):
+        job = GitJob(self, name, func, on_done, coalesce_key, on_progress, on_cancelled, on_error)
+        with self.lock:
+            if coalesce_key:
+                previous = self.queued.get(coalesce_key)
+                if previous:
+                    previous.cancel()
+                self.queued[coalesce_key] = job
+        self.jobs.put(job)
+        return job
+
+    def cancel_all(self):
+        cancelled = 0
+        with self.lock:
+            jobs = list(self.jobs.queue) + ([self.current] if self.current else [])
+        for job in jobs:
+            if not job.cancelled():
+                job.cancel()
+                cancelled += 1
+        return cancelled
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            with self.lock:
+                if job.coalesce_key and self.queued.get(job.coalesce_key) is job:
+                    del self.queued[job.coalesce_key]
+                if job.cancelled():
+                    # Superseded refreshes are dropped silently unless they have state to reset
+                    if not job.coalesce_key or job.on_cancelled:
+                        self.results.put(('cancelled', job, None))
+                    continue
+                self.current = job
+            try:
+                result = job.func(job)
+                self.results.put(('cancelled', job, result) if job.cancelled() else ('done', job, result))
+            except Exception as e:
+                self.results.put(('error', job, e))
+            finally:
+                with self.lock:
+                    self.current = None
+
+    def drain(self):
+        while True:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
 def log_message(console, message, level=logging.INFO):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     full_message = f"{timestamp} - {logging.getLevelName(level)}: {message}"
@@ -436,14 +1503,18 @@ def log_message(console, message, level=logging.INFO):
         logger.error(full_message)
     elif level == logging.DEBUG:
         logger.debug(full_message)
-    console.config(state='normal')
-    console.insert(tk.END, full_message + "\n")
-    console.config(state='disabled')
-    console.yview(tk.END)
+    # Headless callers pass no console and only get the logger output
+    if console is not None:
+        console.write(level, full_message)
 
 def check_and_install_dependencies(console):
     dependencies = ['requests', 'beautifulsoup4', 'gitpython', 'pillow']
-    missing_dependencies = [dep for dep in dependencies if subprocess.call(['pip', 'show', dep]) != 0]
+    missing_dependencies = []
+    for dep in dependencies:
+        try:
+            metadata.version(dep)
+        except metadata.PackageNotFoundError:
+            missing_dependencies.append(dep)
     if missing_dependencies:
         install = messagebox.askyesno("Install Dependencies", f"Missing dependencies: {', '.join(missing_dependencies)}. Install now?")
         if install:
@@ -453,86 +1524,732 @@ def check_and_install_dependencies(console):
 def clone_repo(repo_url, local_path, console):
     try:
         if not os.path.exists(local_path):
-            git.Repo.clone_from(repo_url, local_path)
+            progress = JobProgress(console) if isinstance(console, GitJob) else None
+            git.Repo.clone_from(repo_url, local_path, progress=progress)
             log_message(console, f"Cloned repository to {local_path}")
         else:
             log_message(console, f"Repository already exists at {local_path}")
     except Exception as e:
         log_message(console, f"Error cloning repository: {e}", level=logging.ERROR)
 
+class FileIndex:
+    # In-memory list of repo files, seeded from git and refreshed only when a directory mtime changes
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.files = []
+        self.dir_mtimes = {}
+        self.query_cache = {}
+        self.loaded = False
+        # The Tk thread and the workers share one index per repo; reentrant because queries reload on demand
+        self.lock = threading.RLock()
+
+    def list_files(self):
+        try:
+            repo = git.Repo(self.repo_path)
+            output = repo.git.ls_files('-z', '--cached', '--others', '--exclude-standard')
+            return sorted(set(path for path in output.split('\0') if path and os.path.isfile(os.path.join(self.repo_path, path))))
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError, git.GitCommandError):
+            files = []
+            for root, dirs, filenames in os.walk(self.repo_path):
+                dirs[:] = [d for d in dirs if d != '.git']
+                for file in filenames:
+                    files.append(os.path.relpath(os.path.join(root, file), self.repo_path).replace(os.sep, '/'))
+            return sorted(files)
+
+    def directory_mtimes(self, directories):
+        mtimes = {}
+        for directory in directories:
+            try:
+                mtimes[directory] = os.stat(os.path.join(self.repo_path, directory)).st_mtime_ns
+            except OSError:
+                mtimes[directory] = None
+        return mtimes
+
+    def reload(self):
+        with self.lock:
+            self.files = self.list_files()
+            directories = {''}
+            for path in self.files:
+                parts = path.split('/')[:-1]
+                for i in range(1, len(parts) + 1):
+                    directories.add('/'.join(parts[:i]))
+            self.dir_mtimes = self.directory_mtimes(directories)
+            self.query_cache = {}
+            self.loaded = True
+        logger.debug(f"Indexed {len(self.files)} files in {self.repo_path}")
+
+    def refresh(self):
+        # Adding, removing or renaming an entry bumps its parent directory's mtime
+        with self.lock:
+            if not self.loaded or self.directory_mtimes(self.dir_mtimes) != self.dir_mtimes:
+                self.reload()
+
+    def invalidate(self):
+        self.loaded = False
+
+    def cached_query(self, key, build):
+        with self.lock:
+            self.refresh()
+            if key not in self.query_cache:
+                self.query_cache[key] = build()
+            return self.query_cache[key]
+
+    def files_with_extension(self, extensions):
+        extensions = tuple(extensions)
+        return self.cached_query(('ext', extensions), lambda: [
+            path for path in self.files if path.lower().endswith(extensions)
+        ])
+
+    def contains(self, path):
+        return path in self.cached_query('all', lambda: set(self.files))
+
+    def files_under(self, directory, extensions=None):
+        prefix = directory.strip('/') + '/'
+        extensions = tuple(extensions) if extensions else None
+        return self.cached_query(('under', prefix, extensions), lambda: [
+            path for path in self.files
+            if path.startswith(prefix) and (extensions is None or path.lower().endswith(extensions))
+        ])
+
+    def directory_sizes(self):
+        return self.cached_query(('sizes',), self.build_directory_sizes)
+
+    def build_directory_sizes(self):
+        # Totals cover the same files as the index, so ignored files are not counted
+        sizes = {'': 0}
+        for path in self.files:
+            try:
+                size = os.path.getsize(os.path.join(self.repo_path, path))
+            except OSError:
+                continue
+            parts = path.split('/')[:-1]
+            sizes[''] += size
+            for level in range(1, len(parts) + 1):
+                directory = '/'.join(parts[:level])
+                sizes[directory] = sizes.get(directory, 0) + size
+        return sizes
+
+_file_indexes = {}
+_file_indexes_lock = threading.Lock()
+
+def get_file_index(repo_path):
+    key = os.path.abspath(repo_path)
+    with _file_indexes_lock:
+        if key not in _file_indexes:
+            _file_indexes[key] = FileIndex(repo_path)
+        return _file_indexes[key]
+
+def ignored_paths(repo_path, paths):
+    if not paths:
+        return set()
+    try:
+        output = git.Repo(repo_path).git.check_ignore('--', *paths, with_exceptions=False)
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+        return set()
+    return {line.rstrip('/') for line in output.splitlines()}
+
+def list_directory(repo_path, directory):
+    # One directory at a time, so the cost follows what is expanded rather than the repo size
+    entries = []
+    with os.scandir(os.path.join(repo_path, directory)) as scan:
+        for entry in scan:
+            if entry.name == '.git':
+                continue
+            path = f"{directory}/{entry.name}" if directory else entry.name
+            is_dir = entry.is_dir()
+            entries.append((entry.name, path, is_dir, 0 if is_dir else entry.stat().st_size))
+    ignored = ignored_paths(repo_path, [path + '/' if is_dir else path for _, path, is_dir, _ in entries])
+    entries = [entry for entry in entries if entry[1] not in ignored]
+    return sorted(entries, key=lambda entry: (not entry[2], entry[0].lower()))
+
 def fetch_html_files(repo_path):
-    html_files = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file.endswith('.html'):
-                html_files.append(os.path.relpath(os.path.join(root, file), repo_path))
-    return html_files
+    return list(get_file_index(repo_path).files_with_extension(('.html',)))
 
 def fetch_html_content(repo_path, file_path):
     try:
-        with open(os.path.join(repo_path, file_path), 'r', encoding='utf-8') as file:
+        # newline='' keeps the original line endings so untouched bytes survive a save
+        with open(os.path.join(repo_path, file_path), 'r', encoding='utf-8', newline='') as file:
             content = file.read()
             soup = BeautifulSoup(content, 'html.parser')
             for comment in soup.findAll(text=lambda text: isinstance(text, Comment)):
                 comment.extract()
+            soup.source_patches = []
             return soup, content
     except Exception as e:
         logger.error(f"Error fetching HTML content: {e}")
         return None, None
 
-def list_editable_text(soup):
+def file_version(repo_path, file_path):
+    full_path = os.path.abspath(os.path.join(repo_path, file_path))
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return full_path, None
+    return full_path, (stat.st_mtime_ns, stat.st_size)
+
+def parse_document(repo_path, file_path, job=None):
+    # Runs on the parse worker; index entries are streamed to the UI as they are built
+    _, version = file_version(repo_path, file_path)
+    soup, content = fetch_html_content(repo_path, file_path)
+    if not soup or is_cancelled(job):
+        return None
+    on_chunk = job.progress if job is not None else None
+    editable_texts, links = build_document_index(soup, on_chunk=on_chunk, job=job)
+    if is_cancelled(job):
+        return None
+    return {'version': version, 'soup': soup, 'content': content, 'editable_texts': editable_texts, 'links': links}
+
+class ParsedDocumentCache:
+    # LRU of parsed pages keyed by (path, mtime, size); edited documents are discarded so only clean parses are reused
+    def __init__(self, budget=PARSED_CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.used = 0
+
+    def get(self, repo_path, file_path):
+        full_path, version = file_version(repo_path, file_path)
+        entry = self.entries.get(full_path)
+        if entry and entry['version'] == version:
+            self.entries.move_to_end(full_path)
+            logger.debug(f"Parsed document cache hit: {file_path}")
+            return entry
+        return None
+
+    def put(self, repo_path, file_path, document):
+        self.discard(repo_path, file_path)
+        entry = dict(document, cost=len(document['content']) * PARSED_SIZE_FACTOR)
+        self.entries[os.path.abspath(os.path.join(repo_path, file_path))] = entry
+        self.used += entry['cost']
+        self.evict()
+        return entry
+
+    def discard(self, repo_path, file_path):
+        full_path = os.path.abspath(os.path.join(repo_path, file_path))
+        entry = self.entries.pop(full_path, None)
+        if entry:
+            self.used -= entry['cost']
+
+    def evict(self):
+        # Always keep the most recent document, even if it alone exceeds the budget
+        while self.used > self.budget and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.used -= entry['cost']
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def preview_text(text):
+    text = ' '.join(text[:PREVIEW_LENGTH * 4].split())
+    if len(text) > PREVIEW_LENGTH:
+        return text[:PREVIEW_LENGTH - 3] + '...'
+    return text
+
+def tag_preview(tag):
+    # Stops reading strings as soon as there is enough text for the preview
+    pieces = []
+    length = 0
+    for string in tag.strings:
+        pieces.append(string)
+        length += len(string)
+        if length > PREVIEW_LENGTH * 4:
+            break
+    return preview_text(''.join(pieces).strip())
+
+def link_display_text(tag):
+    return f"{tag.get_text()[:PREVIEW_LENGTH]} ({tag['href']})"
+
+def build_document_index(soup, on_chunk=None, job=None):
+    # One walk collects every editable tag and link along with the span of text they cover
+    pieces = []
+    length = 0
+    tag_count = 0
+    text_spans = []
+    link_spans = []
+    stack = [(iter(soup.children), [])]
+    while stack:
+        children, open_spans = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            for span in open_spans:
+                span[2] = length
+                span[4] = tag_count
+            continue
+        if isinstance(child, Tag):
+            spans = []
+            if child.name in EDITABLE_TAGS:
+                spans.append([child, length, None, tag_count, None])
+                text_spans.append(spans[-1])
+            if child.name == 'a' and child.has_attr('href'):
+                spans.append([child, length, None, tag_count, None])
+                link_spans.append(spans[-1])
+            tag_count += 1
+            if tag_count % 5000 == 0 and is_cancelled(job):
+                return {}, []
+            stack.append((iter(child.children), spans))
+        elif type(child) is NavigableString:
+            pieces.append(child)
+            length += len(child)
+
+    text = ''.join(pieces)
     editable_texts = {}
-    unique_texts = set()
-    for i, tag in enumerate(soup.find_all(['p', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])):
-        text = tag.decode_contents().strip()
-        if text and text not in unique_texts:
-            if len(text) > 50:
-                text_display = text[:47] + '...'
-            else:
-                text_display = text
-            editable_texts[i] = {'tag': tag, 'display_text': text_display}
-            unique_texts.add(text)
-    return editable_texts
+    # (text, nested tag count) -> the first tag seen, or the set of markups once two of them collide
+    unique_texts = {}
+    chunk = {}
+    for tag, start, end, tags_start, tags_end in text_spans:
+        content = text[start:end].strip()
+        markup = None
+        if not content:
+            # Elements holding only markup (an <img> in a <div>, say) are editable too
+            markup = tag.decode_contents().strip()
+            if not markup:
+                continue
+        key = (content, tags_end - tags_start)
+        seen = unique_texts.get(key)
+        if seen is None:
+            unique_texts[key] = tag
+        else:
+            # Only tags that already match on text are serialized, so duplicates are still judged by their markup
+            if isinstance(seen, Tag):
+                seen = unique_texts[key] = {seen.decode_contents().strip()}
+            markup = markup or tag.decode_contents().strip()
+            if markup in seen:
+                continue
+            seen.add(markup)
+        text_info = {'tag': tag, 'display_text': preview_text(content or markup)}
+        editable_texts[len(editable_texts)] = text_info
+        chunk[len(editable_texts) - 1] = text_info
+        if on_chunk and len(chunk) >= PARSE_CHUNK_SIZE:
+            if is_cancelled(job):
+                return {}, []
+            on_chunk((chunk, []))
+            chunk = {}
+
+    links = [
+        {'tag': tag, 'display_text': f"{text[start:end][:PREVIEW_LENGTH]} ({tag['href']})"}
+        for tag, start, end, _, _ in link_spans
+    ]
+    if on_chunk:
+        on_chunk((chunk, links))
+    return editable_texts, links
+
+def make_process_pool(max_workers=None):
+    # Forking a process that has Tk and worker threads running can deadlock the children, so workers are spawned
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def make_thumbnail(source_path, thumbnail_path, size):
+    # Runs in a worker process; writes to a temp name so readers never see half a file
+    with Image.open(source_path) as image:
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        tmp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+        image.save(tmp_path, format='PNG')
+    os.replace(tmp_path, thumbnail_path)
+    return thumbnail_path
+
+class ThumbnailCache:
+    # Thumbnails on disk keyed by (path, mtime, size), generated by a process pool and evicted by total size
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, 'thumbnails'), budget=THUMBNAIL_CACHE_BUDGET, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self.size = size
+        self.executor = None
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def thumbnail_path(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+    def get(self, file_path):
+        thumbnail_path = self.thumbnail_path(file_path)
+        if thumbnail_path and os.path.exists(thumbnail_path):
+            # Touch on use so eviction drops the least recently viewed thumbnails first
+            os.utime(thumbnail_path)
+            return thumbnail_path
+        return None
+
+    def prefetch(self, file_paths):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for file_path in file_paths:
+            thumbnail_path = self.thumbnail_path(file_path)
+            if not thumbnail_path or os.path.exists(thumbnail_path):
+                continue
+            with self.lock:
+                if thumbnail_path in self.pending:
+                    continue
+                if self.executor is None:
+                    self.executor = make_process_pool()
+                future = self.executor.submit(make_thumbnail, file_path, thumbnail_path, self.size)
+                self.pending[thumbnail_path] = future
+            future.add_done_callback(lambda future, path=thumbnail_path, source=file_path: self.finished(path, source, future))
+
+    def finished(self, thumbnail_path, file_path, future):
+        with self.lock:
+            self.pending.pop(thumbnail_path, None)
+            remaining = len(self.pending)
+        if not future.cancelled() and future.exception():
+            logger.warning(f"Error generating thumbnail for {file_path}: {future.exception()}")
+        if remaining == 0:
+            self.evict()
+
+    def evict(self):
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.png')]
+        except FileNotFoundError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.budget:
+                break
+            try:
+                total -= entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
 
-def edit_text(soup, text_id, new_text, editable_texts):
+def list_editable_text(soup):
+    return build_document_index(soup)[0]
+
+def refresh_text_previews(tag, editable_texts):
+    # Only the edited tag and its editable ancestors can show different preview text
+    affected = {id(tag)} | {id(parent) for parent in tag.parents}
+    for text_info in editable_texts.values():
+        if id(text_info['tag']) in affected:
+            text_info['display_text'] = tag_preview(text_info['tag'])
+
+def edit_text(soup, text_id, new_text, editable_texts, links=None):
     try:
         editable_text = editable_texts[text_id]['tag']
+        removed = {id(node) for node in editable_text.descendants}
         editable_text.clear()
         editable_text.append(new_text)
+        record_source_patch(editable_text)
+        for key in [key for key, text_info in editable_texts.items() if id(text_info['tag']) in removed]:
+            del editable_texts[key]
+        if links is not None:
+            links[:] = [link for link in links if id(link['tag']) not in removed]
+        refresh_text_previews(editable_text, editable_texts)
         return soup
     except Exception as e:
         logger.error(f"Error editing text: {e}")
         return soup
 
-def add_text(soup, tag_name, new_text):
+def add_text(soup, tag_name, new_text, editable_texts=None):
     try:
         new_tag = soup.new_tag(tag_name)
         new_tag.string = new_text
         soup.body.append(new_tag)
+        record_source_patch(new_tag, 'append')
+        if editable_texts is not None and tag_name in EDITABLE_TAGS:
+            editable_texts[max(editable_texts, default=-1) + 1] = {'tag': new_tag, 'display_text': tag_preview(new_tag)}
         return soup
     except Exception as e:
         logger.error(f"Error adding text: {e}")
         return soup
 
+def node_path(node):
+    # Child indexes from the soup down to the node; compared by identity since equal-looking siblings are common
+    path = []
+    while node.parent is not None:
+        path.append(next(i for i, child in enumerate(node.parent.contents) if child is node))
+        node = node.parent
+    return path[::-1]
+
+def resolve_node_path(soup, path):
+    node = soup
+    for index in path:
+        node = node.contents[index]
+    return node
+
+def parse_fragment(fragment):
+    fresh = next(child for child in BeautifulSoup(fragment, 'html.parser').contents if isinstance(child, Tag))
+    # Fragment line numbers mean nothing in the page; edits inside it patch the nearest parsed ancestor
+    for node in [fresh] + list(fresh.descendants):
+        if isinstance(node, Tag):
+            node.sourceline = node.sourcepos = None
+    return fresh
+
+def forget_subtree(tag, editable_texts, links, include_self=False):
+    removed = {id(node) for node in tag.descendants}
+    if include_self:
+        removed.add(id(tag))
+    for key in [key for key, text_info in editable_texts.items() if id(text_info['tag']) in removed]:
+        del editable_texts[key]
+    links[:] = [link for link in links if id(link['tag']) not in removed]
+
+def index_subtree(tag, editable_texts, links, include_self=False):
+    sub_texts, sub_links = build_document_index(tag)
+    entries = list(sub_texts.values())
+    if include_self and tag.name in EDITABLE_TAGS:
+        entries.insert(0, {'tag': tag, 'display_text': tag_preview(tag)})
+    if include_self and tag.name == 'a' and tag.has_attr('href'):
+        links.append({'tag': tag, 'display_text': link_display_text(tag)})
+    for text_info in entries:
+        editable_texts[max(editable_texts, default=-1) + 1] = text_info
+    links.extend(sub_links)
+
+def refresh_link_previews(tag, links):
+    affected = {id(tag)} | {id(parent) for parent in tag.parents}
+    for link in links:
+        if id(link['tag']) in affected:
+            link['display_text'] = link_display_text(link['tag'])
+
+def restore_fragment(tag, fragment, editable_texts, links):
+    # Rebuilt in place so the tag keeps its identity and source position
+    fresh = parse_fragment(fragment)
+    forget_subtree(tag, editable_texts, links)
+    tag.attrs = dict(fresh.attrs)
+    tag.clear()
+    for child in list(fresh.contents):
+        tag.append(child.extract())
+    record_source_patch(tag)
+    index_subtree(tag, editable_texts, links)
+    refresh_text_previews(tag, editable_texts)
+    refresh_link_previews(tag, links)
+
+def apply_journal_entry(soup, entry, direction, editable_texts, links):
+    if entry['kind'] == 'replace':
+        tag = resolve_node_path(soup, entry['path'])
+        restore_fragment(tag, entry['old'] if direction == 'undo' else entry['new'], editable_texts, links)
+    elif direction == 'undo':
+        tag = resolve_node_path(soup, entry['path'])
+        forget_subtree(tag, editable_texts, links, include_self=True)
+        tag.extract()
+    else:
+        parent = resolve_node_path(soup, entry['path'][:-1])
+        tag = parse_fragment(entry['new'])
+        parent.insert(entry['path'][-1], tag)
+        record_source_patch(tag, 'append')
+        index_subtree(tag, editable_texts, links, include_self=True)
+
+class EditJournal:
+    # Undo/redo for one document as node-level diffs, mirrored to disk so a crash keeps unsaved edits
+    def __init__(self, repo_path, file_path, base_content, journal_dir=os.path.join(CACHE_DIR, 'journals')):
+        self.file_path = file_path
+        key = hashlib.sha1(f"{os.path.abspath(repo_path)}|{file_path}".encode('utf-8')).hexdigest()
+        self.journal_path = os.path.join(journal_dir, f"{key}.json")
+        self.base_hash = hashlib.sha256(base_content.encode('utf-8')).hexdigest()
+        self.entries = []
+        self.position = 0
+
+    @classmethod
+    def load(cls, repo_path, file_path, base_content):
+        journal = cls(repo_path, file_path, base_content)
+        try:
+            with open(journal.journal_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable edit journal for {file_path}: {e}")
+            return None
+        # Edits were made against a different version of the file; their paths no longer apply
+        if data.get('base_hash') != journal.base_hash:
+            logger.warning(f"Discarding edit journal for {file_path}: the file changed since it was written")
+            journal.delete()
+            return None
+        journal.entries = data['entries']
+        journal.position = data['position']
+        return journal
+
+    def record(self, kind, path, old, new, label):
+        del self.entries[self.position:]
+        self.entries.append({'kind': kind, 'path': path, 'old': old, 'new': new, 'label': label})
+        self.position += 1
+        self.save()
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries)
+
+    def undo(self, soup, editable_texts, links):
+        self.position -= 1
+        entry = self.entries[self.position]
+        apply_journal_entry(soup, entry, 'undo', editable_texts, links)
+        self.save()
+        return entry
+
+    def redo(self, soup, editable_texts, links):
+        entry = self.entries[self.position]
+        apply_journal_entry(soup, entry, 'redo', editable_texts, links)
+        self.position += 1
+        self.save()
+        return entry
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            data = {'file': self.file_path, 'base_hash': self.base_hash, 'position': self.position, 'entries': self.entries}
+            write_file_atomically(self.journal_path, json.dumps(data))
+        except Exception as e:
+            logger.error(f"Error saving edit journal for {self.file_path}: {e}")
+
+    def delete(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+def record_source_patch(tag, kind='replace'):
+    # Remember which nodes changed so save_html_content can splice just those spans
+    root = tag
+    while root.parent is not None:
+        root = root.parent
+    patches = root.__dict__.get('source_patches')
+    if patches is not None:
+        patches.append((kind, tag))
+
+class SourceSpanParser(HTMLParser):
+    # Maps each start tag's (line, column) to the (start, end, close_start) offsets of its element
+    def __init__(self, content):
+        super().__init__(convert_charrefs=False)
+        self.content = content
+        self.line_offsets = [0]
+        newline = content.find('\n')
+        while newline != -1:
+            self.line_offsets.append(newline + 1)
+            newline = content.find('\n', newline + 1)
+        self.spans = {}
+        self.open_tags = []
+
+    def source_offset(self):
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        start = self.source_offset()
+        start_end = start + len(self.get_starttag_text())
+        position = self.getpos()
+        if tag in VOID_TAGS:
+            self.spans[position] = (start, start_end, start_end)
+        else:
+            self.open_tags.append((tag, position, start))
+
+    def handle_startendtag(self, tag, attrs):
+        start = self.source_offset()
+        end = start + len(self.get_starttag_text())
+        self.spans[self.getpos()] = (start, end, end)
+
+    def handle_endtag(self, tag):
+        close_start = self.source_offset()
+        close_end = self.content.find('>', close_start) + 1
+        for i in range(len(self.open_tags) - 1, -1, -1):
+            if self.open_tags[i][0] == tag:
+                # Anything still open inside is implicitly closed here
+                for _, position, start in self.open_tags[i + 1:]:
+                    self.spans[position] = (start, close_start, close_start)
+                _, position, start = self.open_tags[i]
+                self.spans[position] = (start, close_end, close_start)
+                del self.open_tags[i:]
+                break
+
+def source_spans(content):
+    parser = SourceSpanParser(content)
+    parser.feed(content)
+    parser.close()
+    return parser.spans
+
+def find_source_span(tag, spans, content):
+    if tag.sourceline is None:
+        return None
+    span = spans.get((tag.sourceline, tag.sourcepos))
+    # Guard against the two parsers disagreeing about malformed markup
+    if span is None or content[span[0]:span[0] + len(tag.name) + 1].lower() != f"<{tag.name}":
+        return None
+    return span
+
+def is_attached(tag, soup):
+    root = tag
+    while root.parent is not None:
+        root = root.parent
+    return root is soup
+
+def build_source_edits(soup, original_content):
+    spans = source_spans(original_content)
+    patches = soup.__dict__.get('source_patches', [])
+    appended = {id(tag) for kind, tag in patches if kind == 'append'}
+    edits = []
+    for kind, tag in patches:
+        if not is_attached(tag, soup):
+            continue
+        if kind == 'append':
+            span = find_source_span(tag.parent, spans, original_content)
+            if span is None:
+                return None
+            edits.append((span[2], span[2], tag))
+        else:
+            # Nodes created during editing have no source position; rewrite the nearest parsed ancestor
+            node = tag
+            while node is not None and node.sourceline is None and id(node) not in appended:
+                node = node.parent
+            if node is not None and id(node) in appended:
+                continue
+            if node is None or node is soup:
+                return None
+            span = find_source_span(node, spans, original_content)
+            if span is None:
+                return None
+            edits.append((span[0], span[1], node))
+
+    # Outer replacements already include any edits nested inside them
+    edits.sort(key=lambda edit: (edit[0], -edit[1]))
+    merged = []
+    for start, end, node in edits:
+        if merged and start < merged[-1][1] and end <= merged[-1][1]:
+            continue
+        if merged and start < merged[-1][1]:
+            return None
+        merged.append((start, end, node))
+    return merged
+
+def write_file_atomically(file_path, content):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o777)
+        os.replace(tmp_path, file_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def render_html_content(soup, original_content, file_path=''):
+    edits = build_source_edits(soup, original_content) if original_content is not None else None
+    if edits is None:
+        logger.warning(f"Could not map edits to source positions; rewriting all of {file_path}")
+        return str(soup)
+    # The parser turns CRLF into LF, so rewritten spans get the file's own line endings back
+    newline = '\r\n' if '\r\n' in original_content else '\n'
+    # Splice from the end so earlier offsets stay valid
+    new_content = original_content
+    for start, end, node in reversed(edits):
+        fragment = str(node)
+        if newline != '\n':
+            fragment = fragment.replace('\r\n', '\n').replace('\n', newline)
+        new_content = new_content[:start] + fragment + new_content[end:]
+    logger.debug(f"Patched {len(edits)} source range(s) in {file_path}")
+    return new_content
+
 def save_html_content(file_path, soup, original_content):
     try:
-        new_content = str(soup)
-        original_lines = original_content.splitlines()
-        new_lines = new_content.splitlines()
-        
-        # Ensure closing </html> tag is present
-        if not new_lines[-1].strip().lower().endswith('</html>'):
-            new_lines.append('</html>')
-        
-        updated_lines = []
-        for original_line, new_line in zip(original_lines, new_lines):
-            if original_line.strip() != new_line.strip():
-                updated_lines.append(new_line)
-            else:
-                updated_lines.append(original_line)
-        
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write('\n'.join(updated_lines))
+        new_content = render_html_content(soup, original_content, file_path)
+        write_file_atomically(file_path, new_content)
+        soup.source_patches = []
         return True
     except Exception as e:
         logger.error(f"Error saving HTML content: {e}")
@@ -547,48 +2264,419 @@ def pull_latest_changes(repo_path, console):
     except git.GitCommandError as e:
         log_message(console, f"Error pulling latest changes: {e}", level=logging.ERROR)
 
-def commit_changes(repo_path, commit_message, commit_description, console):
+def is_cancelled(console):
+    return isinstance(console, GitJob) and console.cancelled()
+
+def push_changes(repo, console):
+    # Last chance to back out before anything leaves the machine
+    if is_cancelled(console):
+        log_message(console, "Push cancelled; changes are committed locally.", level=logging.WARNING)
+        return False
+    progress = JobProgress(console) if isinstance(console, GitJob) else None
+    repo.remote(name='origin').push(progress=progress)
+    return True
+
+def commits_ahead(repo):
+    tracking = repo.active_branch.tracking_branch()
+    if tracking is None:
+        return 0
+    return sum(1 for _ in repo.iter_commits(f"{tracking.name}..HEAD"))
+
+def publish_changes(repo_path, commit_message, commit_description, add_paths, remove_paths, console):
+    # One pull, one commit and one push for a whole batch of staged changes
     try:
         pull_latest_changes(repo_path, console)
+        if is_cancelled(console):
+            return False
+        if BUILD_ON_PUBLISH:
+            build_results = build_site_files(repo_path, add_paths)
+            if build_results:
+                add_paths = add_paths + [path for path in written_paths(build_results) if path not in add_paths]
+                log_message(console, build_summary(build_results))
         repo = git.Repo(repo_path)
-        repo.git.add(update=True)
-        repo.index.commit(f"{commit_message}\n\n{commit_description}" if commit_description else commit_message)
-        origin = repo.remote(name='origin')
-        origin.push()
-        log_message(console, "Committed and pushed changes")
+        # A path both added and removed (an upload deleted before publishing) is simply gone
+        add_paths = [path for path in add_paths if path not in remove_paths]
+        if add_paths:
+            repo.git.add('--', *add_paths)
+        if remove_paths:
+            repo.git.rm('--ignore-unmatch', '--', *remove_paths)
+        if repo.index.diff('HEAD'):
+            repo.index.commit(f"{commit_message}\n\n{commit_description}" if commit_description else commit_message)
+        elif commits_ahead(repo):
+            # Nothing new since a publish whose push failed; only the push is retried
+            log_message(console, "Changes are already committed locally; retrying the push.")
+        else:
+            log_message(console, "Nothing to commit.", level=logging.WARNING)
+            return True
+        if not push_changes(repo, console):
+            return False
+        log_message(console, f"Committed and pushed {len(add_paths) + len(remove_paths)} file change(s)")
+        return True
     except git.GitCommandError as e:
         log_message(console, f"Error committing changes: {e}", level=logging.ERROR)
+        return False
 
-def upload_image(repo_path, file_path, target_dir, console):
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+def webp_sibling(path):
+    stem, ext = os.path.splitext(path)
+    return None if ext.lower() == '.webp' else stem + '.webp'
+
+def unique_image_name(target_dir, name):
+    # Uploads never replace an existing image or its .webp sibling; clashing names get a numeric suffix
+    candidate = name
+    suffix = 1
+    while any(os.path.exists(os.path.join(target_dir, candidate + ext)) for ext in IMAGE_EXTENSIONS):
+        candidate = f"{name}-{suffix}"
+        suffix += 1
+    return candidate
+
+def optimize_image(source_path, target_dir, name):
+    # Runs in a worker process: downscale, drop EXIF/ICC metadata and re-encode
+    before = os.path.getsize(source_path)
+    ext = os.path.splitext(source_path)[1].lower()
+    target_path = os.path.join(target_dir, name + ext)
+    outputs = [target_path]
+
+    with Image.open(source_path) as original:
+        if ext == '.gif' and getattr(original, 'is_animated', False):
+            # Re-encoding would flatten animations, so animated GIFs are copied as-is
+            with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+                dst.write(src.read())
+            sha256, phash = hash_image(target_path)
+            return {'source': source_path, 'outputs': outputs, 'before': before, 'after': before, 'sha256': sha256, 'source_sha256': sha256, 'phash': phash}
+
+        # Apply the camera orientation before the EXIF block is dropped
+        upright = original.getexif().get(0x0112, 1) == 1
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail(IMAGE_MAX_DIMENSIONS, Image.LANCZOS)
+        unchanged_pixels = upright and image.size == original.size
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+        if ext in ('.jpg', '.jpeg'):
+            image.convert('RGB').save(target_path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        elif ext == '.png':
+            image.save(target_path, format='PNG', optimize=True)
+        elif ext == '.gif':
+            image.save(target_path, format='GIF', optimize=True)
+        else:
+            # Anything else is converted to JPEG, or PNG when it has transparency
+            ext = '.png' if has_alpha else '.jpg'
+            target_path = outputs[0] = os.path.join(target_dir, name + ext)
+            if has_alpha:
+                image.convert('RGBA').save(target_path, format='PNG', optimize=True)
+            else:
+                image.convert('RGB').save(target_path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+        if IMAGE_WEBP_VARIANT:
+            webp_path = os.path.join(target_dir, name + '.webp')
+            image.convert('RGBA' if has_alpha else 'RGB').save(webp_path, format='WEBP', quality=WEBP_QUALITY, method=6)
+            outputs.append(webp_path)
+
+    if ext in ('.jpg', '.jpeg') and unchanged_pixels and os.path.getsize(target_path) >= before:
+        # Re-encoding an already compact JPEG can make it bigger; dropping its metadata losslessly may do better
+        stripped = strip_jpeg_metadata(source_path)
+        if stripped is not None and len(stripped) < os.path.getsize(target_path):
+            with open(target_path, 'wb') as file:
+                file.write(stripped)
+
+    sha256, phash = hash_image(target_path)
+    # Originals already committed unoptimized only match on the source bytes
+    source_sha256 = file_sha256(source_path)
+    return {'source': source_path, 'outputs': outputs, 'before': before, 'after': os.path.getsize(target_path), 'sha256': sha256, 'source_sha256': source_sha256, 'phash': phash}
+
+def strip_jpeg_metadata(source_path):
+    # The JPEG byte for byte minus its EXIF, ICC, XMP, IPTC and comment segments; None if it cannot be parsed
+    with open(source_path, 'rb') as file:
+        data = file.read()
+    if data[:2] != b'\xff\xd8':
+        return None
+    output = [data[:2]]
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            position += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: the rest is image data
+            output.append(data[position:])
+            return b''.join(output)
+        length = int.from_bytes(data[position + 2:position + 4], 'big')
+        segment = data[position:position + 2 + length]
+        # APP0 (JFIF) and APP14 (Adobe colour transform) affect decoding and are kept
+        if not (0xE1 <= marker <= 0xED or marker in (0xEF, 0xFE)):
+            output.append(segment)
+        position += 2 + length
+    return None
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_image(file_path):
+    # Content hash for exact copies plus a 64-bit difference hash for re-encoded or resized copies
+    sha256 = file_sha256(file_path)
     try:
-        repo = git.Repo(repo_path)
-        target_path = os.path.join(repo.working_tree_dir, target_dir, os.path.basename(file_path))
-        os.makedirs(os.path.dirname(target_path), exist_ok=True)
-        os.replace(file_path, target_path)
-        repo.git.add(target_path)
-        repo.index.commit(f"Add image {os.path.basename(file_path)}")
-        origin = repo.remote(name='origin')
-        origin.push()
-        log_message(console, f"Uploaded and committed image: {os.path.basename(file_path)}")
-    except git.GitCommandError as e:
-        log_message(console, f"Error uploading image: {e}", level=logging.ERROR)
-    except Exception as e:
-        log_message(console, f"Unexpected error: {e}", level=logging.ERROR)
-
-def delete_image(repo_path, file_path, console):
+        with Image.open(file_path) as image:
+            pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+        phash = 0
+        for row in range(8):
+            for col in range(8):
+                phash = (phash << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    except Exception:
+        phash = None
+    return sha256, phash
+
+class ImageIndex:
+    # Persistent content and perceptual hashes for every image in the repo, refreshed from file mtimes
+    def __init__(self, repo_path, index_dir=CACHE_DIR):
+        self.repo_path = repo_path
+        repo_key = hashlib.sha1(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:12]
+        self.index_path = os.path.join(index_dir, f"image_index_{repo_key}.json")
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            self.entries = {}
+        except (IOError, ValueError) as e:
+            logger.warning(f"Rebuilding unreadable image index: {e}")
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self):
+        paths = get_file_index(self.repo_path).files_with_extension(IMAGE_EXTENSIONS)
+        stale = {}
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(self.repo_path, path))
+            except OSError:
+                continue
+            entry = self.entries.get(path)
+            if not entry or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                stale[path] = stat
+
+        changed = bool(stale) or set(self.entries) - set(paths)
+        self.entries = {path: entry for path, entry in self.entries.items() if path in paths}
+        if stale:
+            logger.debug(f"Hashing {len(stale)} new or changed image(s)")
+            with make_process_pool() as executor:
+                hashes = executor.map(hash_image, [os.path.join(self.repo_path, path) for path in stale])
+                for (path, stat), (sha256, phash) in zip(stale.items(), hashes):
+                    self.entries[path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256, 'phash': phash}
+        if changed:
+            self.save()
+        return self
+
+    def primary_entries(self):
+        # A .webp written next to an image is a copy of it by design, so it never counts as a duplicate
+        stems = {os.path.splitext(path)[0] for path in self.entries if webp_sibling(path)}
+        return {path: entry for path, entry in self.entries.items() if webp_sibling(path) or os.path.splitext(path)[0] not in stems}
+
+    def find_exact(self, sha256):
+        return [path for path, entry in self.primary_entries().items() if entry['sha256'] == sha256]
+
+    def find_similar(self, phash):
+        if phash is None:
+            return []
+        return [
+            path for path, entry in self.primary_entries().items()
+            if entry['phash'] is not None and bin(entry['phash'] ^ phash).count('1') <= NEAR_DUPLICATE_DISTANCE
+        ]
+
+    def duplicate_groups(self):
+        by_hash = {}
+        for path, entry in self.primary_entries().items():
+            by_hash.setdefault(entry['sha256'], []).append(path)
+        exact_groups = [sorted(paths) for paths in by_hash.values() if len(paths) > 1]
+
+        # Split the 64-bit hash into NEAR_DUPLICATE_DISTANCE + 1 bands; any close pair shares at least one band exactly
+        band_count = NEAR_DUPLICATE_DISTANCE + 1
+        band_bits = -(-64 // band_count)
+        unique = {paths[0]: self.entries[paths[0]]['phash'] for paths in by_hash.values() if self.entries[paths[0]]['phash'] is not None}
+        buckets = {}
+        for path, phash in unique.items():
+            for band in range(band_count):
+                key = (band, (phash >> (band * band_bits)) & ((1 << band_bits) - 1))
+                buckets.setdefault(key, []).append(path)
+
+        parent = {path: path for path in unique}
+        def find(path):
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+        for paths in buckets.values():
+            for i, first in enumerate(paths):
+                for second in paths[i + 1:]:
+                    if bin(unique[first] ^ unique[second]).count('1') <= NEAR_DUPLICATE_DISTANCE:
+                        parent[find(first)] = find(second)
+        near = {}
+        for path in unique:
+            near.setdefault(find(path), []).append(path)
+        near_groups = [sorted(paths) for paths in near.values() if len(paths) > 1]
+        return exact_groups, near_groups
+
+def duplicate_report(image_index, console):
+    image_index.update()
+    exact_groups, near_groups = image_index.duplicate_groups()
+    reclaimable = sum(image_index.entries[group[0]]['size'] * (len(group) - 1) for group in exact_groups)
+    lines = [f"Indexed {len(image_index.entries)} image(s).", f"Exact duplicates: {len(exact_groups)} group(s), {format_size(reclaimable)} reclaimable.", ""]
+    for group in exact_groups:
+        lines.append(f"{format_size(image_index.entries[group[0]]['size'])} x {len(group)}:")
+        lines += [f"    {path}" for path in group]
+    lines += ["", f"Near duplicates (perceptual hash within {NEAR_DUPLICATE_DISTANCE} bits): {len(near_groups)} group(s)", ""]
+    for group in near_groups:
+        lines += [f"    {path} ({format_size(image_index.entries[path]['size'])})" for path in group]
+        lines.append("")
+    log_message(console, f"Duplicate scan: {len(exact_groups)} exact group(s), {format_size(reclaimable)} reclaimable; {len(near_groups)} near-duplicate group(s)")
+    return "\n".join(lines)
+
+def stage_images(repo_path, file_paths, target_dir, console):
+    # Optimizes uploads into the working tree without committing them
+    repo = git.Repo(repo_path)
+    target_path = os.path.join(repo.working_tree_dir, target_dir)
+    os.makedirs(target_path, exist_ok=True)
+
+    image_index = ImageIndex(repo_path).update()
+
+    results = []
+    # Images are optimized outside the repo and only moved in once they pass the duplicate check
+    with tempfile.TemporaryDirectory() as staging_dir, make_process_pool() as executor:
+        futures = []
+        for i, file_path in enumerate(file_paths):
+            # One directory per upload, so files with the same name in one batch stay apart
+            upload_dir = os.path.join(staging_dir, str(i))
+            os.makedirs(upload_dir)
+            futures.append(executor.submit(optimize_image, file_path, upload_dir, os.path.splitext(os.path.basename(file_path))[0]))
+        for file_path, future in zip(file_paths, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                log_message(console, f"Error optimizing {os.path.basename(file_path)}: {e}", level=logging.ERROR)
+                continue
+            duplicates = image_index.find_exact(result['sha256']) + image_index.find_exact(result['source_sha256'])
+            hashes = {result['sha256'], result['source_sha256']}
+            duplicates += [os.path.basename(other['outputs'][0]) for other in results if hashes & {other['sha256'], other['source_sha256']}]
+            if duplicates:
+                # Reject the copy and point at the file that is already there
+                log_message(console, f"Skipped {os.path.basename(file_path)}: identical to {duplicates[0]}", level=logging.WARNING)
+                continue
+            similar = image_index.find_similar(result['phash'])
+            if similar:
+                log_message(console, f"{os.path.basename(file_path)} looks like {', '.join(similar[:3])}", level=logging.WARNING)
+            name = unique_image_name(target_path, os.path.splitext(os.path.basename(result['outputs'][0]))[0])
+            outputs = []
+            for path in result['outputs']:
+                final_path = os.path.join(target_path, name + os.path.splitext(path)[1])
+                shutil.move(path, final_path)
+                outputs.append(final_path)
+            result['outputs'] = outputs
+            results.append(result)
+            saved = result['before'] - result['after']
+            log_message(console, f"Optimized {os.path.basename(file_path)}: {format_size(result['before'])} -> {format_size(result['after'])} ({abs(saved) * 100 // max(result['before'], 1)}% {'smaller' if saved >= 0 else 'larger'})")
+
+    if results:
+        before = sum(result['before'] for result in results)
+        after = sum(result['after'] for result in results)
+        log_message(console, f"Optimized {len(results)} image(s): {format_size(before)} -> {format_size(after)}")
+    return results
+
+def fetch_commit_history(repo_path, branch='main', skip=0, max_count=COMMIT_PAGE_SIZE, cache=None):
+    repo = git.Repo(repo_path)
+    cache = cache or CommitCache()
+    return [cache.metadata(commit) for commit in repo.iter_commits(branch, max_count=max_count, skip=skip)]
+
+def fetch_new_commits(repo_path, known_head, cache, branch='main'):
+    repo = git.Repo(repo_path)
     try:
-        repo = git.Repo(repo_path)
-        target_path = os.path.join(repo.working_tree_dir, file_path)
-        os.remove(target_path)
-        repo.git.add(target_path)
-        repo.index.commit(f"Delete image {os.path.basename(file_path)}")
-        origin = repo.remote(name='origin')
-        origin.push()
-        log_message(console, f"Deleted and committed image: {file_path}")
-    except git.GitCommandError as e:
-        log_message(console, f"Error deleting image: {e}", level=logging.ERROR)
-    except FileNotFoundError:
-        log_message(console, f"File not found: {file_path}", level=logging.ERROR)
+        if not repo.is_ancestor(known_head, branch):
+            return None
+    except git.GitCommandError:
+        return None
+    return [cache.metadata(commit) for commit in repo.iter_commits(f"{known_head}..{branch}")]
+
+def compute_commit_files(commit):
+    # The root commit has no parent, so it is compared against the empty tree
+    if commit.parents:
+        diffs = commit.parents[0].diff(commit)
+    else:
+        diffs = commit.diff(git.NULL_TREE)
+    change_types = {}
+    for diff in diffs:
+        change_types[diff.b_path or diff.a_path] = diff.change_type
+    files = []
+    for path, stats in commit.stats.files.items():
+        files.append({
+            'path': path,
+            'change_type': change_types.get(path, 'M'),
+            'insertions': stats['insertions'],
+            'deletions': stats['deletions'],
+        })
+    return files
+
+def fetch_commit_details(repo_path, commit_hash, cache=None):
+    cache = cache or CommitCache()
+    cached = cache.details(commit_hash)
+    if cached:
+        return cached
+    commit = git.Repo(repo_path).commit(commit_hash)
+    cache.metadata(commit)
+    details = cache.store_files(commit.hexsha, compute_commit_files(commit))
+    cache.save()
+    return details
+
+def prefetch_commit_details(repo_path, shas, cache, job=None):
+    repo = git.Repo(repo_path)
+    computed = 0
+    for sha in shas:
+        if is_cancelled(job):
+            break
+        if cache.details(sha):
+            continue
+        commit = repo.commit(sha)
+        cache.metadata(commit)
+        cache.store_files(sha, compute_commit_files(commit))
+        computed += 1
+    if computed:
+        cache.save()
+
+def format_commit_entry(entry):
+    return f"{entry['sha'][:7]} - {entry['summary']}"
+
+def format_commit_details(details):
+    lines = [
+        f"Commit ID: {details['sha']}",
+        f"Author: {details['author']}",
+        f"Date: {details['date']}",
+        f"Message: {details['message'].strip()}",
+        "",
+        f"Files Changed ({len(details['files'])}):",
+    ]
+    for file in details['files']:
+        lines.append(f"{file['path']} ({file['change_type']}) +{file['insertions']} -{file['deletions']}")
+    return "\n".join(lines)
 
 if __name__ == "__main__":
     app = TextEditorApp()
@@ -1,22 +1,58 @@
 import os
+import re
+import time
+import json
+import heapq
+import hashlib
 import shutil
 import platform
+from concurrent.futures import ThreadPoolExecutor, wait
 from ics import Calendar
+from bs4 import BeautifulSoup
 from git import Repo, GitCommandError
 import logging
 import colorlog
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from datetime import datetime
-import pytz
+from datetime import datetime, date
+from html import escape
+from urllib.parse import urlsplit
+from functools import lru_cache
+from itertools import repeat
+from zoneinfo import ZoneInfo
+from site_build import BUILD_EXTENSIONS, build_changed_files, build_summary, minify, written_paths
 
 # Constants
 GITHUB_REPO = 'https://github.com/dareaquatics/dare-website'
 ICS_URL = 'https://www.gomotionapp.com/rest/ics/system/5/Events.ics?key=l4eIgFXwqEbxbQz42YjRgg%3D%3D&enabled=false&tz=America%2FLos_Angeles'
+# Team, league and facility calendars are merged into one page; add feeds here
+ICS_FEEDS = [
+    ICS_URL,
+]
+FEED_TIMEOUT = 30
 GITHUB_TOKEN = 'REDACTED'
 REPO_NAME = 'dare-website'
 EVENTS_HTML_FILE = 'calendar.html'
+# Past events are archived one page per month, e.g. calendar/2026-09.html
+ARCHIVE_DIR = 'calendar'
+CALENDAR_SCRIPT_FILE = 'assets/js/calendar.js'
+# Trimmed machine-readable feeds of upcoming events only
+EVENTS_ICS_FILE = 'events.ics'
+EVENTS_JSON_FILE = 'events.json'
+START_MARKER = '<!-- START UNDER HERE -->'
+END_MARKER = '<!-- END AUTOMATION SCRIPT -->'
 TIMEZONE = 'America/Los_Angeles'
+EVENTS_PAGE_URL = 'https://www.gomotionapp.com/team/cadas/page/events#/team-events/upcoming'
+
+# Optional detail-page enrichment (meet info and entry deadlines)
+ENRICH_EVENTS = os.getenv('ENRICH_EVENTS', '0') == '1'
+ENRICH_CONCURRENCY = int(os.getenv('ENRICH_CONCURRENCY', '8'))
+ENRICH_DEADLINE = int(os.getenv('ENRICH_DEADLINE', '60'))
+ENRICH_TIMEOUT = 10
+ENRICH_MAX_AGE = 6 * 60 * 60
+# Kept next to the script, outside the cloned site repo, so it is never committed
+ENRICH_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.event_details_cache.json')
 
 # Setup colored logging
 handler = colorlog.StreamHandler()
@@ -168,10 +204,33 @@ def check_github_token_validity():
         logging.error(f"Error validating GitHub token: {e}")
         exit(1)
 
-def fetch_events():
+# Events are kept as epoch seconds plus a tz key; dates are only formatted for display
+@lru_cache(maxsize=None)
+def get_zone(tz_key):
+    return ZoneInfo(tz_key)
+
+def to_epoch(value, tz_key=TIMEZONE, all_day=False):
+    # ics hands back arrow objects; unwrap them once at the parse boundary
+    dt = getattr(value, 'datetime', value)
+    if all_day:
+        # All-day dates are floating, so pin them to midnight in the site timezone
+        dt = datetime(dt.year, dt.month, dt.day, tzinfo=get_zone(tz_key))
+    elif dt.tzinfo is None:
+        dt = dt.replace(tzinfo=get_zone(tz_key))
+    return int(dt.timestamp())
+
+@lru_cache(maxsize=4096)
+def format_day(day_ordinal, fmt):
+    return date.fromordinal(day_ordinal).strftime(fmt)
+
+def format_epoch(epoch, tz_key, fmt='%B %d, %Y'):
+    day = datetime.fromtimestamp(epoch, get_zone(tz_key)).toordinal()
+    return format_day(day, fmt)
+
+def fetch_feed(session, url):
     try:
-        logging.info("Fetching events from .ics file...")
-        response = requests.get(ICS_URL)
+        logging.info(f"Fetching events from {url}...")
+        response = session.get(url, timeout=FEED_TIMEOUT)
         response.raise_for_status()
 
         calendar = Calendar(response.text)
@@ -179,73 +238,363 @@ def fetch_events():
         event_items = []
 
         for event in calendar.events:
+            all_day = getattr(event, 'all_day', False)
             event_items.append({
+                'uid': event.uid,
                 'title': event.name,
-                'start': event.begin,
-                'end': event.end,
+                'start': to_epoch(event.begin, TIMEZONE, all_day),
+                'end': to_epoch(event.end, TIMEZONE, all_day),
+                'tz': TIMEZONE,
+                'all_day': all_day,
                 'description': event.description if event.description else '',
                 'url': event.url if event.url else '#'
             })
 
-        # Sort events by start date
+        # Each feed is sorted on its own so the feeds can be k-way merged
         event_items.sort(key=lambda x: x['start'])
-        logging.info("Successfully fetched and sorted event items.")
+        logging.info(f"Fetched {len(event_items)} events from {url}")
         return event_items
 
     except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching events: {e}")
+        logging.error(f"Error fetching events from {url}: {e}")
+        return []
+    except Exception as e:
+        logging.error(f"Error parsing events from {url}: {e}")
         return []
 
-def generate_html(event_items):
-    logging.info("Generating HTML for event items...")
-    current_date = datetime.now(pytz.timezone(TIMEZONE))  # Convert current_date to timezone-aware datetime
-    upcoming_events_html = ''
-    past_events_html = ''
+def event_dedupe_key(item):
+    # Different feeds rarely share UIDs, so fall back to title + start time
+    title = re.sub(r'[^a-z0-9]+', ' ', (item['title'] or '').lower()).strip()
+    return title, item['start']
+
+def merge_feeds(feeds):
+    seen_uids = set()
+    # Fuzzy key -> indexes of the feeds it was seen in
+    seen_keys = {}
+    tagged_feeds = [zip(repeat(feed_index), feed) for feed_index, feed in enumerate(feeds)]
+    for feed_index, item in heapq.merge(*tagged_feeds, key=lambda x: x[1]['start']):
+        key = event_dedupe_key(item)
+        key_feeds = seen_keys.setdefault(key, set())
+        # Within one feed the UID is trusted; the fuzzy key only matches across feeds or when the UID is missing
+        if (item['uid'] and item['uid'] in seen_uids) or (key_feeds and (not item['uid'] or key_feeds - {feed_index})):
+            logging.debug(f"Skipping duplicate event: {item['title']}")
+            continue
+        if item['uid']:
+            seen_uids.add(item['uid'])
+        key_feeds.add(feed_index)
+        yield item
+
+def fetch_events():
+    logging.info(f"Fetching events from {len(ICS_FEEDS)} .ics feed(s)...")
+    with requests.Session() as session:
+        # Feeds are fetched in parallel, so wall time tracks the slowest feed
+        with ThreadPoolExecutor(max_workers=max(1, len(ICS_FEEDS))) as executor:
+            feeds = list(executor.map(lambda url: fetch_feed(session, url), ICS_FEEDS))
+
+    event_items = list(merge_feeds(feeds))
+    logging.info(f"Successfully fetched and merged {len(event_items)} event items.")
+    return event_items
+
+def load_details_cache():
+    try:
+        with open(ENRICH_CACHE_FILE, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (IOError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable event details cache: {e}")
+        return {}
+
+def save_details_cache(cache):
+    try:
+        tmp_path = ENRICH_CACHE_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, ENRICH_CACHE_FILE)
+    except IOError as e:
+        logging.error(f"Error saving event details cache: {e}")
+
+def parse_event_details(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    summary = ''
+    meta = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
+    if meta and meta.get('content'):
+        summary = meta['content'].strip()
+    elif soup.find('p'):
+        summary = soup.find('p').get_text(' ', strip=True)
+
+    text = soup.get_text('\n', strip=True)
+    match = re.search(r'entr(?:y|ies)\s+deadline\s*:?\s*(.+)', text, re.IGNORECASE)
+    deadline = match.group(1).strip()[:100] if match else ''
+
+    return {'summary': summary[:300], 'deadline': deadline}
+
+def fetch_event_details(session, url, cached, deadline):
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    # Never let a single request run past the overall deadline
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline passed before the request started")
+    with session.get(url, headers=headers, timeout=min(ENRICH_TIMEOUT, remaining), stream=True) as response:
+        if response.status_code == 304 and cached:
+            return dict(cached, fetched_at=time.time())
+
+        response.raise_for_status()
+        # The timeout only bounds each read, so the body is checked against the deadline as it arrives
+        body = b''
+        for chunk in response.iter_content(chunk_size=16384):
+            body += chunk
+            if time.monotonic() > deadline:
+                raise TimeoutError("deadline passed while reading the page")
+        html = body.decode(response.encoding or 'utf-8', errors='replace')
+    details = parse_event_details(html)
+    details['etag'] = response.headers.get('ETag')
+    details['last_modified'] = response.headers.get('Last-Modified')
+    details['fetched_at'] = time.time()
+    return details
+
+def enrich_events(event_items, upcoming_items):
+    cache = load_details_cache()
+    now = time.time()
+    urls = {item['url'] for item in upcoming_items if is_web_url(item['url'])}
+    # Recently checked pages are reused as-is; older ones are revalidated
+    stale_urls = [url for url in urls if now - cache.get(url, {}).get('fetched_at', 0) > ENRICH_MAX_AGE]
+
+    if stale_urls:
+        logging.info(f"Fetching {len(stale_urls)} event detail page(s) ({len(urls) - len(stale_urls)} cached)...")
+        deadline = time.monotonic() + ENRICH_DEADLINE
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=ENRICH_CONCURRENCY, pool_maxsize=ENRICH_CONCURRENCY)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            # Requests in flight at the deadline stop on their own timeout, so leaving the pool stays bounded
+            with ThreadPoolExecutor(max_workers=ENRICH_CONCURRENCY) as executor:
+                futures = {executor.submit(fetch_event_details, session, url, cache.get(url), deadline): url for url in stale_urls}
+                done, not_done = wait(futures, timeout=ENRICH_DEADLINE)
+                for future in not_done:
+                    future.cancel()
+
+            for future in done:
+                url = futures[future]
+                try:
+                    cache[url] = future.result()
+                except Exception as e:
+                    logging.warning(f"Error fetching event details from {url}: {e}")
+
+            if not_done:
+                logging.warning(f"{len(not_done)} event detail page(s) missed the {ENRICH_DEADLINE}s deadline; using cached details.")
+
+    # Drop pages for events that are no longer in any feed
+    known_urls = {item['url'] for item in event_items}
+    cache = {url: details for url, details in cache.items() if url in known_urls}
+    save_details_cache(cache)
 
     for item in event_items:
-        event_html = f'''
+        if item['url'] in cache:
+            item['details'] = cache[item['url']]
+
+CALENDAR_SCRIPT = '''var coll = document.getElementsByClassName("collapsible");
+for (var i = 0; i < coll.length; i++) {
+  coll[i].addEventListener("click", function() {
+    this.classList.toggle("active");
+    var content = this.nextElementSibling;
+    if (content.style.display === "block") {
+      content.style.display = "none";
+    } else {
+      content.style.display = "block";
+    }
+  });
+}
+'''
+
+def is_web_url(url):
+    # Feed URLs are third-party input; anything but http(s) (javascript:, data:, ...) is never linked
+    return urlsplit(url or '').scheme.lower() in ('http', 'https')
+
+def generate_event_html(item):
+    details = item.get('details', {})
+    description = escape(details.get('summary') or 'Click the button below for more information.')
+    deadline_html = f'''
+          <p><b>Entry Deadline:</b> {escape(details["deadline"])}</p>''' if details.get('deadline') else ''
+    more_info_url = escape(item['url'] if is_web_url(item['url']) else EVENTS_PAGE_URL, quote=True)
+    return f'''
         <div class="event">
-          <h2><strong>{item["title"]}</strong></h2>
-          <p><b>Event Start:</b> {item["start"].strftime('%B %d, %Y')}</p>
-          <p><b>Event End:</b> {item["end"].strftime('%B %d, %Y')}</p>
-          <p><b>Description:</b> Click the button below for more information.</p>
-          <a href="https://www.gomotionapp.com/team/cadas/page/events#/team-events/upcoming" target="_blank" rel="noopener noreferrer" class="btn btn-primary">More Info</a>
+          <h2><strong>{escape(item["title"] or '')}</strong></h2>
+          <p><b>Event Start:</b> {format_epoch(item["start"], item["tz"])}</p>
+          <p><b>Event End:</b> {format_epoch(item["end"], item["tz"])}</p>{deadline_html}
+          <p><b>Description:</b> {description}</p>
+          <a href="{more_info_url}" target="_blank" rel="noopener noreferrer" class="btn btn-primary">More Info</a>
         </div>
         <br><hr><br>
         '''
 
-        if item['start'] > current_date:
-            upcoming_events_html += event_html
+def partition_events(event_items):
+    current_time = int(time.time())
+    upcoming_items = []
+    archive = {}
+
+    for item in event_items:
+        if item['start'] > current_time:
+            upcoming_items.append(item)
         else:
-            past_events_html += event_html
+            archive.setdefault(format_epoch(item['start'], item['tz'], '%Y-%m'), []).append(item)
+
+    return upcoming_items, archive
+
+def archive_page_path(month):
+    return f"{ARCHIVE_DIR}/{month}.html"
+
+def generate_html(upcoming_items, archive_months):
+    logging.info("Generating HTML for event items...")
+    upcoming_events_html = ''.join(generate_event_html(item) for item in upcoming_items)
+    past_events_html = ''
 
-    # Create collapsible section for past events
-    if past_events_html:
+    # Past events live on their own month pages; only link to them here
+    if archive_months:
+        month_links = ''.join(
+            f'''
+            <li><a href="{archive_page_path(month)}">{datetime.strptime(month, '%Y-%m').strftime('%B %Y')}</a></li>'''
+            for month in sorted(archive_months, reverse=True)
+        )
         past_events_html = f'''
         <button type="button" class="collapsible">Past Events</button>
         <div class="content" style="display: none;">
-          {past_events_html}
+          <ul>{month_links}
+          </ul>
         </div>
-        <script>
-        var coll = document.getElementsByClassName("collapsible");
-        for (var i = 0; i < coll.length; i++) {{
-          coll[i].addEventListener("click", function() {{
-            this.classList.toggle("active");
-            var content = this.nextElementSibling;
-            if (content.style.display === "block") {{
-              content.style.display = "none";
-            }} else {{
-              content.style.display = "block";
-            }}
-          }});
-        }}
-        </script>
+        <script src="{CALENDAR_SCRIPT_FILE}"></script>
         '''
-        
+
     html_content = upcoming_events_html + past_events_html
     logging.info("Successfully generated HTML.")
     return html_content
 
+def escape_ics_text(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+def fold_ics_line(line):
+    # RFC 5545 caps content lines at 75 octets; continuation lines start with a space
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts)
+
+def format_ics_time(epoch):
+    return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(epoch))
+
+def event_dates(item):
+    # All-day events are stored as local midnights; DTEND is the exclusive day after the last one
+    zone = get_zone(item['tz'])
+    start_day = datetime.fromtimestamp(item['start'], zone).date()
+    end_day = datetime.fromtimestamp(item['end'], zone).date()
+    return start_day, max(end_day, date.fromordinal(start_day.toordinal() + 1))
+
+def generate_feeds(upcoming_items):
+    logging.info("Generating ICS and JSON feeds for upcoming events...")
+    ics_lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//DARE Aquatics//Events Feed//EN',
+        f'X-WR-TIMEZONE:{TIMEZONE}',
+    ]
+    json_items = []
+
+    for item in upcoming_items:
+        uid = item['uid'] or hashlib.sha1(f"{item['title']}|{item['start']}".encode('utf-8')).hexdigest()
+        zone = get_zone(item['tz'])
+        ics_lines += [
+            'BEGIN:VEVENT',
+            f'UID:{uid}',
+            # DTSTAMP is pinned to the start time so unchanged events hash the same
+            f"DTSTAMP:{format_ics_time(item['start'])}",
+        ]
+        if item.get('all_day'):
+            start_day, end_day = event_dates(item)
+            ics_lines += [
+                f"DTSTART;VALUE=DATE:{start_day.strftime('%Y%m%d')}",
+                f"DTEND;VALUE=DATE:{end_day.strftime('%Y%m%d')}",
+            ]
+            start, end = start_day.isoformat(), end_day.isoformat()
+        else:
+            ics_lines += [
+                f"DTSTART:{format_ics_time(item['start'])}",
+                f"DTEND:{format_ics_time(item['end'])}",
+            ]
+            start = datetime.fromtimestamp(item['start'], zone).isoformat()
+            end = datetime.fromtimestamp(item['end'], zone).isoformat()
+        ics_lines.append(f"SUMMARY:{escape_ics_text(item['title'])}")
+        if is_web_url(item['url']):
+            ics_lines.append(f"URL:{item['url']}")
+        ics_lines.append('END:VEVENT')
+
+        json_items.append({
+            'uid': uid,
+            'title': item['title'],
+            'start': start,
+            'end': end,
+            'all_day': bool(item.get('all_day')),
+            'url': item['url'] if is_web_url(item['url']) else None,
+        })
+
+    ics_lines.append('END:VCALENDAR')
+    ics_content = '\r\n'.join(fold_ics_line(line) for line in ics_lines) + '\r\n'
+    json_content = json.dumps({'timezone': TIMEZONE, 'events': json_items}, ensure_ascii=False, separators=(',', ':'))
+    return ics_content, json_content
+
+def generate_archive_html(month, items):
+    heading = datetime.strptime(month, '%Y-%m').strftime('%B %Y')
+    events_html = ''.join(generate_event_html(item) for item in items)
+    return f'''
+        <h1>{heading}</h1>
+        <p><a href="{EVENTS_HTML_FILE}">Back to upcoming events</a></p>
+        {events_html}
+        '''
+
+def replace_between_markers(content, new_html):
+    start_index = content.find(START_MARKER)
+    end_index = content.find(END_MARKER)
+
+    if start_index == -1 or end_index == -1:
+        return None
+
+    start_index += len(START_MARKER)
+    return content[:start_index] + '\n' + new_html + '\n' + content[end_index:]
+
+def write_if_changed(path, content):
+    # Published pages are minified, so compare in that form or every page would look changed
+    if path.lower().endswith(BUILD_EXTENSIONS):
+        content = minify(path, content)
+    data = content.encode('utf-8')
+    try:
+        with open(path, 'rb') as file:
+            if hashlib.sha256(file.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Binary mode keeps the feed's CRLF line endings intact on every platform
+    with open(path, 'wb') as file:
+        file.write(data)
+    return True
+
 def update_html_file(event_html):
     try:
         if not os.path.exists(EVENTS_HTML_FILE):
@@ -256,29 +605,70 @@ def update_html_file(event_html):
         with open(EVENTS_HTML_FILE, 'r', encoding='utf-8') as file:
             content = file.read()
 
-        start_marker = '<!-- START UNDER HERE -->'
-        end_marker = '<!-- END AUTOMATION SCRIPT -->'
-        start_index = content.find(start_marker) + len(start_marker)
-        end_index = content.find(end_marker)
+        updated_content = replace_between_markers(content, event_html)
 
-        if start_index == -1 or end_index == -1:
+        if updated_content is None:
             logging.error("Markers not found in the HTML file.")
             return
 
-        updated_content = content[:start_index] + '\n' + event_html + '\n' + content[end_index:]
-
-        with open(EVENTS_HTML_FILE, 'w', encoding='utf-8') as file:
-            file.write(updated_content)
-        logging.info("Successfully updated HTML file.")
+        if write_if_changed(EVENTS_HTML_FILE, updated_content):
+            logging.info("Successfully updated HTML file.")
+        else:
+            logging.info("HTML file already up-to-date.")
 
     except IOError as e:
         logging.error(f"Error updating HTML file: {e}")
 
+def update_archive_pages(archive):
+    try:
+        with open(EVENTS_HTML_FILE, 'r', encoding='utf-8') as file:
+            shell = file.read()
+
+        # Archive pages reuse the calendar page layout from one directory down
+        shell = shell.replace('<head>', '<head>\n  <base href="../">', 1)
+
+        rewritten = 0
+        for month, items in archive.items():
+            page = replace_between_markers(shell, generate_archive_html(month, items))
+            if page is None:
+                logging.error("Markers not found in the HTML file.")
+                return
+            if write_if_changed(archive_page_path(month), page):
+                logging.debug(f"Rewrote archive page for {month}")
+                rewritten += 1
+
+        logging.info(f"Archive pages: {rewritten} of {len(archive)} month(s) rewritten.")
+
+    except IOError as e:
+        logging.error(f"Error updating archive pages: {e}")
+
+def update_feed_files(ics_content, json_content):
+    try:
+        for path, content in ((EVENTS_ICS_FILE, ics_content), (EVENTS_JSON_FILE, json_content)):
+            if write_if_changed(path, content):
+                logging.info(f"Wrote {path}")
+            else:
+                logging.info(f"{path} unchanged.")
+    except IOError as e:
+        logging.error(f"Error writing event feeds: {e}")
+
+def update_calendar_script():
+    try:
+        if write_if_changed(CALENDAR_SCRIPT_FILE, CALENDAR_SCRIPT):
+            logging.info(f"Wrote {CALENDAR_SCRIPT_FILE}")
+    except IOError as e:
+        logging.error(f"Error writing calendar script: {e}")
+
 def push_to_github():
     try:
         logging.info("Pushing changes to GitHub...")
         repo = Repo(os.getcwd())
 
+        # Regenerated pages come out indented again; minifying first means an unchanged calendar is not dirty
+        build_results = build_changed_files(os.getcwd())
+        if build_results:
+            logging.info(build_summary(build_results))
+
         if repo.is_dirty(untracked_files=True):
             with tqdm(total=100, desc='Committing changes') as pbar:
                 def update_commit_pbar(cur_count, max_count=None, message=''):
@@ -287,7 +677,7 @@ def push_to_github():
                     pbar.update(cur_count - pbar.n)
                     pbar.set_postfix_str(message)
 
-                repo.git.add(EVENTS_HTML_FILE)
+                repo.git.add(*[path for path in (EVENTS_HTML_FILE, CALENDAR_SCRIPT_FILE, ARCHIVE_DIR, EVENTS_ICS_FILE, EVENTS_JSON_FILE) if os.path.exists(path)], *written_paths(build_results))
                 repo.index.commit('automated commit: sync TeamUnify calendar')
                 pbar.update(100)
 
@@ -328,10 +718,21 @@ def main():
             logging.error("No event items fetched. Aborting update process.")
             return
 
-        event_html = generate_html(event_items)
+        upcoming_items, archive = partition_events(event_items)
+
+        if ENRICH_EVENTS:
+            enrich_events(event_items, upcoming_items)
+
+        event_html = generate_html(upcoming_items, archive.keys())
 
         update_html_file(event_html)
 
+        update_archive_pages(archive)
+
+        update_calendar_script()
+
+        update_feed_files(*generate_feeds(upcoming_items))
+
         push_to_github()
 
         logging.info("Update process completed.")
@@ -0,0 +1,256 @@
+# Link checker for dareaquatics/dare-website.
+# Internal targets are resolved against the repo's file index; external URLs are checked
+# concurrently with a pooled, per-host rate-limited session and cached by URL.
+
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import json
+import argparse
+import logging
+import posixpath
+import threading
+from urllib.parse import urljoin, urlsplit, unquote
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from editor import CACHE_DIR, LOCAL_REPO_PATH, get_file_index, make_process_pool
+
+LINK_ATTRIBUTES = (('a', 'href'), ('img', 'src'))
+LINK_CHECK_CONCURRENCY = 8
+LINK_CHECK_TIMEOUT = 10
+# Minimum seconds between two requests to the same host
+LINK_CHECK_HOST_INTERVAL = 0.5
+# Working links are rechecked daily, broken ones sooner in case they were a blip
+LINK_CACHE_TTL = 24 * 60 * 60
+LINK_CACHE_BROKEN_TTL = 60 * 60
+LINK_CHECK_USER_AGENT = 'dare-website-link-checker/1.0'
+# Some servers reject HEAD outright; those are retried with GET
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+
+logger = logging.getLogger('link_checker')
+
+
+def collect_file_links(repo_path, file_path):
+    # Runs in a worker process
+    with open(os.path.join(repo_path, file_path), 'r', encoding='utf-8', errors='replace') as file:
+        soup = BeautifulSoup(file.read(), 'html.parser')
+    # Archive pages carry <base href="../">, which relative links resolve against instead of the page's folder
+    base_tag = soup.find('base', href=True)
+    base = base_tag['href'].strip() if base_tag else ''
+    links = []
+    for tag_name, attribute in LINK_ATTRIBUTES:
+        for tag in soup.find_all(tag_name):
+            url = (tag.get(attribute) or '').strip()
+            if not url:
+                continue
+            if classify_link(base) == 'external':
+                # An absolute base sends every relative link off-site, so check what the browser would fetch
+                links.append({'file': file_path, 'line': tag.sourceline, 'attribute': attribute, 'url': urljoin(base, url), 'base': ''})
+            else:
+                links.append({'file': file_path, 'line': tag.sourceline, 'attribute': attribute, 'url': url, 'base': base})
+    return links
+
+
+def collect_links(repo_path, workers=None):
+    html_files = get_file_index(repo_path).files_with_extension(('.html',))
+    links = []
+    with make_process_pool(workers) as executor:
+        for file_links in executor.map(collect_file_links, [repo_path] * len(html_files), html_files):
+            links.extend(file_links)
+    return links
+
+
+def classify_link(url):
+    parts = urlsplit(url)
+    if parts.scheme in ('http', 'https') or url.startswith('//'):
+        return 'external'
+    if parts.scheme or not parts.path:
+        # Other schemes, and same-page anchors like "#top"
+        return 'skipped'
+    return 'internal'
+
+
+def resolve_internal(file_path, url, base=''):
+    path = unquote(urlsplit(url).path)
+    if base and not path.startswith('/'):
+        base_path = unquote(urlsplit(base).path)
+        path = posixpath.join(base_path if base_path.endswith('/') else posixpath.dirname(base_path), path)
+    if path.startswith('/'):
+        target = path.lstrip('/')
+    else:
+        target = posixpath.join(posixpath.dirname(file_path), path)
+    target = posixpath.normpath(target)
+    if target.startswith('..'):
+        return None
+    return target
+
+
+def check_internal(repo_path, file_path, url, base=''):
+    target = resolve_internal(file_path, url, base)
+    if target is None:
+        return False, 'points outside the repository'
+    file_index = get_file_index(repo_path)
+    if file_index.contains(target) or file_index.contains(posixpath.join(target, 'index.html')):
+        return True, None
+    return False, f"{target} not found"
+
+
+class HostRateLimiter:
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_allowed = {}
+
+    def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed.get(host, now))
+            self.next_allowed[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LinkCache:
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_path = os.path.join(cache_dir, 'link_cache.json')
+        self.entries = {}
+        self.lock = threading.Lock()
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable link cache: {e}")
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        ttl = LINK_CACHE_TTL if entry['ok'] else LINK_CACHE_BROKEN_TTL
+        if time.time() - entry['checked'] > ttl:
+            return None
+        return entry
+
+    def put(self, url, ok, status, error):
+        entry = {'ok': ok, 'status': status, 'error': error, 'checked': time.time()}
+        with self.lock:
+            self.entries[url] = entry
+        return entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file)
+        os.replace(tmp_path, self.cache_path)
+
+
+def make_session(concurrency=LINK_CHECK_CONCURRENCY):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = LINK_CHECK_USER_AGENT
+    return session
+
+
+def check_external(session, limiter, url):
+    request_url = 'https:' + url if url.startswith('//') else url
+    host = urlsplit(request_url).netloc
+    try:
+        limiter.wait(host)
+        response = session.head(request_url, timeout=LINK_CHECK_TIMEOUT, allow_redirects=True)
+        if response.status_code in HEAD_FALLBACK_STATUSES:
+            limiter.wait(host)
+            response = session.get(request_url, timeout=LINK_CHECK_TIMEOUT, allow_redirects=True, stream=True)
+            response.close()
+        ok = response.status_code < 400
+        return ok, response.status_code, None if ok else f"HTTP {response.status_code}"
+    except requests.RequestException as e:
+        return False, None, str(e)
+
+
+def check_external_urls(urls, cache, concurrency=LINK_CHECK_CONCURRENCY, job=None):
+    results = {}
+    stale = []
+    for url in urls:
+        entry = cache.get(url)
+        if entry:
+            results[url] = entry
+        else:
+            stale.append(url)
+    if stale:
+        logger.info(f"Checking {len(stale)} external URL(s), {len(results)} served from cache...")
+        session = make_session(concurrency)
+        limiter = HostRateLimiter(LINK_CHECK_HOST_INTERVAL)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {url: executor.submit(check_external, session, limiter, url) for url in stale}
+            for url, future in futures.items():
+                if job is not None and job.cancelled():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+                results[url] = cache.put(url, *future.result())
+        session.close()
+        cache.save()
+    return results
+
+
+def check_links(repo_path, check_external_links=True, workers=None, job=None):
+    links = collect_links(repo_path, workers)
+    external_urls = sorted({link['url'] for link in links if classify_link(link['url']) == 'external'})
+    external_results = {}
+    if check_external_links:
+        external_results = check_external_urls(external_urls, LinkCache(), job=job)
+
+    results = []
+    for link in links:
+        kind = classify_link(link['url'])
+        if kind == 'internal':
+            ok, error = check_internal(repo_path, link['file'], link['url'], link['base'])
+            status = None
+        elif kind == 'external' and link['url'] in external_results:
+            entry = external_results[link['url']]
+            ok, status, error = entry['ok'], entry['status'], entry['error']
+        elif kind == 'external' and check_external_links:
+            # Left over from a cancelled check; reported so the result never looks clean by omission
+            ok, status, error = None, None, 'not checked'
+        else:
+            continue
+        results.append(dict(link, kind=kind, ok=ok, status=status, error=error))
+    return results
+
+
+def link_check_summary(results):
+    broken = sum(result['ok'] is False for result in results)
+    unchecked = sum(result['ok'] is None for result in results)
+    return f"{broken} broken" + (f", {unchecked} not checked" if unchecked else '')
+
+
+def format_link_result(result):
+    state = 'ok' if result['ok'] else result['error']
+    return f"{result['file']}:{result['line']} {result['attribute']}={result['url']} - {state}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the site's links and image sources.")
+    parser.add_argument('--repo', default=LOCAL_REPO_PATH, help="path to the website repository")
+    parser.add_argument('--internal-only', action='store_true', help="skip checking external URLs")
+    parser.add_argument('--all', action='store_true', help="list working links too")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes for parsing")
+    args = parser.parse_args()
+
+    results = check_links(args.repo, check_external_links=not args.internal_only, workers=args.workers)
+    broken = [result for result in results if not result['ok']]
+    for result in results if args.all else broken:
+        print(format_link_result(result))
+    logger.info(f"Checked {len(results)} link(s); {link_check_summary(results)}.")
+    sys.exit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# Publish-time build step for dareaquatics/dare-website.
+# Minifies the HTML, CSS and JS files in a pending commit and writes .gz/.br siblings for static hosting.
+# Used by the sync scripts and the editor; standalone so neither drags in the other's dependencies.
+
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import gzip
+import hashlib
+import argparse
+import logging
+from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+
+# Brotli is optional; without it only .gz siblings are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Optional; JavaScript is left as written when it is missing, since a naive JS minifier is easy to get wrong
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+BUILD_EXTENSIONS = ('.html', '.css', '.js')
+# Below this the compressed copy saves less than the extra file costs
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Kept next to the script, outside the site repo, so it is never committed
+BUILD_MANIFEST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.build_manifest.json')
+
+# Whitespace inside these is significant, so they are copied through untouched
+PRESERVED_HTML_BLOCKS = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+HTML_LINE_BREAK = re.compile(r'[ \t]*\r?\n\s*')
+CSS_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.DOTALL)
+CSS_PUNCTUATION_SPACE = re.compile(r'\s*([{};,>])\s*')
+
+logger = logging.getLogger('site_build')
+
+
+def minify_html(content):
+    # Conservative: a newline plus indentation becomes one newline, which renders the same.
+    # Comments stay, since the sync scripts find their markers by them.
+    newline = '\r\n' if '\r\n' in content else '\n'
+    pieces = []
+    position = 0
+    for block in PRESERVED_HTML_BLOCKS.finditer(content):
+        pieces.append(HTML_LINE_BREAK.sub(newline, content[position:block.start()]))
+        pieces.append(block.group(0))
+        position = block.end()
+    pieces.append(HTML_LINE_BREAK.sub(newline, content[position:]))
+    return ''.join(pieces).strip() + newline
+
+
+def minify_css(content):
+    pieces = []
+    position = 0
+    for token in CSS_TOKENS.finditer(content):
+        pieces.append(minify_css_code(content[position:token.start()]))
+        text = token.group(0)
+        # /*! ... */ marks a licence comment that has to ship
+        if not text.startswith('/*') or text.startswith('/*!'):
+            pieces.append(text)
+        position = token.end()
+    pieces.append(minify_css_code(content[position:]))
+    return ''.join(pieces).strip() + '\n'
+
+
+def minify_css_code(code):
+    code = re.sub(r'\s+', ' ', code)
+    return CSS_PUNCTUATION_SPACE.sub(r'\1', code).replace(';}', '}')
+
+
+def minify_js(content):
+    if rjsmin is None:
+        return content
+    return rjsmin.jsmin(content) + '\n'
+
+
+def minify(path, content):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.html':
+        return minify_html(content)
+    if extension == '.css':
+        return minify_css(content)
+    return minify_js(content)
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (IOError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable build manifest: {e}")
+        return {}
+
+
+def save_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, manifest_path)
+
+
+def write_bytes(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def compressed_siblings(path):
+    return [path + '.gz'] + ([path + '.br'] if brotli is not None else [])
+
+
+def build_file(repo_path, path, manifest):
+    full_path = os.path.join(repo_path, path)
+    with open(full_path, 'rb') as file:
+        source = file.read()
+    output = minify(path, source.decode('utf-8')).encode('utf-8')
+    result = {'path': path, 'before': len(source), 'after': len(output), 'gzip': None, 'brotli': None, 'written': [], 'skipped': False}
+
+    if output != source:
+        write_bytes(full_path, output)
+        result['written'].append(path)
+
+    key = os.path.abspath(full_path)
+    digest = hashlib.sha256(output).hexdigest()
+    siblings = compressed_siblings(path) if len(output) >= COMPRESS_MIN_SIZE else []
+    if manifest.get(key) == digest and all(os.path.exists(os.path.join(repo_path, sibling)) for sibling in siblings):
+        # Same output as last build; the compressed copies are already current
+        result['skipped'] = True
+        return result
+
+    if siblings:
+        gzip_data = gzip.compress(output, compresslevel=GZIP_LEVEL, mtime=0)
+        write_bytes(full_path + '.gz', gzip_data)
+        result['gzip'] = len(gzip_data)
+        result['written'].append(path + '.gz')
+        if brotli is not None:
+            brotli_data = brotli.compress(output, quality=BROTLI_QUALITY)
+            write_bytes(full_path + '.br', brotli_data)
+            result['brotli'] = len(brotli_data)
+            result['written'].append(path + '.br')
+    manifest[key] = digest
+    return result
+
+
+def build_site_files(repo_path, paths, manifest_path=BUILD_MANIFEST_FILE):
+    paths = [path for path in paths if path.lower().endswith(BUILD_EXTENSIONS) and os.path.isfile(os.path.join(repo_path, path))]
+    manifest = load_manifest(manifest_path)
+    results = []
+    for path in paths:
+        try:
+            results.append(build_file(repo_path, path, manifest))
+        except (IOError, UnicodeDecodeError) as e:
+            logger.error(f"Error building {path}: {e}")
+    if results:
+        save_manifest(manifest_path, manifest)
+    return results
+
+
+def changed_files(repo_path):
+    # Modified, added and untracked files, i.e. what the next commit would pick up
+    try:
+        output = Repo(repo_path).git.status('--porcelain', '-z', '--untracked-files=all')
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return []
+    paths = []
+    entries = output.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        status, path = entry[:2], entry[3:]
+        if 'R' in status or 'C' in status:
+            # Renames and copies are followed by the original path
+            i += 1
+        if 'D' not in status:
+            paths.append(path)
+    return paths
+
+
+def build_changed_files(repo_path, manifest_path=BUILD_MANIFEST_FILE):
+    return build_site_files(repo_path, changed_files(repo_path), manifest_path)
+
+
+def written_paths(results):
+    return [path for result in results for path in result['written']]
+
+
+def format_bytes(num_bytes):
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    return f"{num_bytes / 1024:.1f} KB"
+
+
+def build_summary(results):
+    before = sum(result['before'] for result in results)
+    after = sum(result['after'] for result in results)
+    saved = before - after
+    percent = saved * 100 / before if before else 0
+    summary = f"Built {len(results)} file(s): minifying saved {format_bytes(saved)} ({percent:.0f}%)"
+    compressed = [result for result in results if result['gzip'] is not None]
+    if compressed:
+        raw = sum(result['after'] for result in compressed)
+        summary += f"; gzip serves {format_bytes(raw)} as {format_bytes(sum(result['gzip'] for result in compressed))}"
+        if brotli is not None:
+            summary += f", brotli as {format_bytes(sum(result['brotli'] for result in compressed))}"
+    skipped = sum(result['skipped'] for result in results)
+    if skipped:
+        summary += f"; {skipped} unchanged"
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify the site's changed HTML, CSS and JS and write compressed siblings.")
+    parser.add_argument('paths', nargs='*', help="files to build, relative to the repo (default: files changed since the last commit)")
+    parser.add_argument('--repo', default='.', help="path to the website repository")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if brotli is None:
+        logger.info("brotli is not installed; writing .gz files only (pip install brotli).")
+    results = build_site_files(args.repo, args.paths) if args.paths else build_changed_files(args.repo)
+    if not results:
+        logger.info("Nothing to build.")
+        return
+    logger.info(build_summary(results))
+    for result in results:
+        print(f"{result['path']}: {format_bytes(result['before'])} -> {format_bytes(result['after'])}{' (unchanged)' if result['skipped'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# Full-text and href search across the HTML files of dareaquatics/dare-website.
+# The inverted index is persisted next to the editor and refreshed only for files whose mtime changed.
+
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+import hashlib
+import argparse
+import logging
+from bs4 import BeautifulSoup, NavigableString
+from editor import CACHE_DIR, EDITABLE_TAGS, LOCAL_REPO_PATH, get_file_index, make_process_pool
+
+# Text is attributed to the nearest of these enclosing elements
+SEARCH_NODE_TAGS = EDITABLE_TAGS | {'a', 'li', 'td', 'th', 'title', 'button', 'label'}
+SKIPPED_TAGS = {'script', 'style', 'noscript'}
+TOKEN_PATTERN = re.compile(r'\w+')
+MAX_RESULTS = 200
+
+logger = logging.getLogger('site_search')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def index_file(repo_path, file_path):
+    # Runs in a worker process; returns the nodes of one file and what points at them
+    with open(os.path.join(repo_path, file_path), 'r', encoding='utf-8', errors='replace') as file:
+        soup = BeautifulSoup(file.read(), 'html.parser')
+
+    nodes = []
+    node_ids = {}
+    tokens = {}
+    hrefs = {}
+
+    def node_for(tag):
+        key = id(tag)
+        if key not in node_ids:
+            node_ids[key] = len(nodes)
+            nodes.append([tag.sourceline, tag.sourcepos, tag.name, ''])
+        return node_ids[key]
+
+    for string in soup.find_all(string=True):
+        if type(string) is not NavigableString or not string.strip():
+            continue
+        parent = string.parent
+        if any(ancestor.name in SKIPPED_TAGS for ancestor in [parent] + list(parent.parents)):
+            continue
+        node = parent
+        while node.parent is not None and node.name not in SEARCH_NODE_TAGS:
+            node = node.parent
+        if node.sourceline is None:
+            continue
+        node_id = node_for(node)
+        if len(nodes[node_id][3]) < 80:
+            nodes[node_id][3] = ' '.join((nodes[node_id][3] + ' ' + string.strip()).split())[:80]
+        for token in tokenize(string):
+            tokens.setdefault(token, set()).add(node_id)
+
+    for tag in soup.find_all(href=True):
+        if tag.sourceline is not None:
+            hrefs.setdefault(tag['href'], set()).add(node_for(tag))
+
+    return {
+        'nodes': nodes,
+        'tokens': {token: sorted(ids) for token, ids in tokens.items()},
+        'hrefs': {href: sorted(ids) for href, ids in hrefs.items()},
+    }
+
+
+class SearchIndex:
+    def __init__(self, repo_path, index_dir=CACHE_DIR):
+        self.repo_path = repo_path
+        repo_key = hashlib.sha1(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:12]
+        self.index_path = os.path.join(index_dir, f"search_index_{repo_key}.json")
+        self.files = {}
+        self.tokens = {}
+        self.hrefs = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.files = data['files']
+            self.tokens = data['tokens']
+            self.hrefs = data['hrefs']
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable search index: {e}")
+            self.files, self.tokens, self.hrefs = {}, {}, {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'files': self.files, 'tokens': self.tokens, 'hrefs': self.hrefs}, file)
+        os.replace(tmp_path, self.index_path)
+
+    def remove_file(self, path):
+        entry = self.files.pop(path, None)
+        if not entry:
+            return
+        # Each file remembers its own keys, so removal never scans the whole index
+        for postings, keys in ((self.tokens, entry['tokens']), (self.hrefs, entry['hrefs'])):
+            for key in keys:
+                files = postings.get(key)
+                if files:
+                    files.pop(path, None)
+                    if not files:
+                        del postings[key]
+
+    def add_file(self, path, stat, result):
+        self.files[path] = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'nodes': result['nodes'],
+            'tokens': list(result['tokens']),
+            'hrefs': list(result['hrefs']),
+        }
+        for token, node_ids in result['tokens'].items():
+            self.tokens.setdefault(token, {})[path] = node_ids
+        for href, node_ids in result['hrefs'].items():
+            self.hrefs.setdefault(href, {})[path] = node_ids
+
+    def update(self, workers=None):
+        paths = get_file_index(self.repo_path).files_with_extension(('.html',))
+        stale = {}
+        for path in paths:
+            try:
+                stat = os.stat(os.path.join(self.repo_path, path))
+            except OSError:
+                continue
+            entry = self.files.get(path)
+            if not entry or entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                stale[path] = stat
+
+        removed = set(self.files) - set(paths)
+        for path in removed | set(stale):
+            self.remove_file(path)
+
+        if stale:
+            logger.info(f"Indexing {len(stale)} new or changed HTML file(s)...")
+            with make_process_pool(workers) as executor:
+                futures = {path: executor.submit(index_file, self.repo_path, path) for path in stale}
+                for path, future in futures.items():
+                    try:
+                        self.add_file(path, stale[path], future.result())
+                    except Exception as e:
+                        logger.error(f"Error indexing {path}: {e}")
+        if stale or removed:
+            self.save()
+        return self
+
+    def results_for(self, matches):
+        results = []
+        for path in sorted(matches):
+            nodes = self.files[path]['nodes']
+            for node_id in sorted(matches[path]):
+                line, column, tag, preview = nodes[node_id]
+                results.append({'file': path, 'line': line, 'column': column, 'tag': tag, 'preview': preview})
+                if len(results) >= MAX_RESULTS:
+                    return results
+        return results
+
+    def search(self, query):
+        # Every word must appear in the same element
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        postings = [self.tokens.get(token, {}) for token in tokens]
+        postings.sort(key=len)
+        matches = {}
+        for path, node_ids in postings[0].items():
+            common = set(node_ids)
+            for other in postings[1:]:
+                common &= set(other.get(path, ()))
+                if not common:
+                    break
+            if common:
+                matches[path] = common
+        return self.results_for(matches)
+
+    def search_href(self, fragment):
+        matches = {}
+        for href, files in self.hrefs.items():
+            if fragment in href:
+                for path, node_ids in files.items():
+                    matches.setdefault(path, set()).update(node_ids)
+        return self.results_for(matches)
+
+
+def format_result(result):
+    return f"{result['file']}:{result['line']}:{result['column']} <{result['tag']}> {result['preview']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the site's HTML for text or link targets.")
+    parser.add_argument('query', help="words to find, or part of a URL with --href")
+    parser.add_argument('--href', action='store_true', help="find elements whose href contains the query")
+    parser.add_argument('--repo', default=LOCAL_REPO_PATH, help="path to the website repository")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.repo).update()
+    results = index.search_href(args.query) if args.href else index.search(args.query)
+    for result in results:
+        print(format_result(result))
+    logger.info(f"{len(results)} result(s).")
+
+
+if __name__ == "__main__":
+    main()
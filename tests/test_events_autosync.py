@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import events_autosync
+
+DETAIL_PAGE = b'''<html><head><meta name="description" content="Championship meet at the aquatic center."></head>
+<body><p>Entry Deadline: October 1, 2099</p></body></html>'''
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        StubHandler.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/slow'):
+            time.sleep(5)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(DETAIL_PAGE)))
+        self.end_headers()
+        self.wfile.write(DETAIL_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def details_cache(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / 'details.json')
+    monkeypatch.setattr(events_autosync, 'ENRICH_CACHE_FILE', cache_file)
+    return cache_file
+
+
+def make_event(url):
+    return {'uid': url, 'title': 'Meet', 'start': 4000000000, 'end': 4000003600, 'tz': events_autosync.TIMEZONE, 'all_day': False, 'url': url}
+
+
+def test_enrich_events_fetches_and_caches_details(stub_server, details_cache):
+    item = make_event(f"{stub_server}/meet")
+    events_autosync.enrich_events([item], [item])
+
+    assert item['details']['summary'] == 'Championship meet at the aquatic center.'
+    assert item['details']['deadline'] == 'October 1, 2099'
+    assert events_autosync.load_details_cache()[item['url']]['etag'] == '"v1"'
+
+
+def test_enrich_events_revalidates_stale_entries(stub_server, details_cache, monkeypatch):
+    item = make_event(f"{stub_server}/meet")
+    events_autosync.enrich_events([item], [item])
+    monkeypatch.setattr(events_autosync, 'ENRICH_MAX_AGE', -1)
+
+    second = make_event(item['url'])
+    events_autosync.enrich_events([second], [second])
+
+    assert StubHandler.requests_seen[-1] == ('/meet', '"v1"')
+    assert second['details']['summary'] == 'Championship meet at the aquatic center.'
+
+
+def test_enrich_events_keeps_going_after_a_failed_page(stub_server, details_cache):
+    good = make_event(f"{stub_server}/meet")
+    missing = make_event(f"{stub_server}/missing")
+    events_autosync.enrich_events([good, missing], [good, missing])
+
+    assert 'details' in good
+    assert 'details' not in missing
+
+
+def test_enrich_events_is_bounded_by_the_deadline(stub_server, details_cache, monkeypatch):
+    monkeypatch.setattr(events_autosync, 'ENRICH_DEADLINE', 1)
+    items = [make_event(f"{stub_server}/slow?{i}") for i in range(3)] + [make_event(f"{stub_server}/meet")]
+
+    started = time.monotonic()
+    events_autosync.enrich_events(items, items)
+
+    assert time.monotonic() - started < 3
+    assert 'details' in items[-1]
+    assert not any('details' in item for item in items[:-1])
+
+
+def test_generate_event_html_escapes_the_event_url():
+    item = make_event('https://example.com/?a=1&b="2"')
+    html = events_autosync.generate_event_html(item)
+    assert 'href="https://example.com/?a=1&amp;b=&quot;2&quot;"' in html
+
+
+def test_generate_event_html_escapes_the_title():
+    item = make_event('https://example.com/meet')
+    item['title'] = 'Practice <b>x</b>'
+    assert '<strong>Practice &lt;b&gt;x&lt;/b&gt;</strong>' in events_autosync.generate_event_html(item)
+
+
+def test_generate_event_html_only_links_web_urls():
+    item = make_event('javascript:alert(1)')
+    html = events_autosync.generate_event_html(item)
+    assert 'javascript:' not in html
+    assert f'href="{events_autosync.escape(events_autosync.EVENTS_PAGE_URL)}"' in html
@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import link_checker
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def respond(self):
+        if self.path == '/ok':
+            status = 200
+        elif self.path == '/no-head':
+            # Servers that reject HEAD are retried with GET
+            status = 405 if self.command == 'HEAD' else 200
+        else:
+            status = 404
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_HEAD = respond
+    do_GET = respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CancelledJob:
+    def cancelled(self):
+        return True
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def site(tmp_path, stub_server, monkeypatch):
+    repo = tmp_path / 'site'
+    (repo / 'about').mkdir(parents=True)
+    (repo / 'about' / 'index.html').write_text('<p>About</p>')
+    (repo / 'logo.png').write_bytes(b'')
+    (repo / 'index.html').write_text(f'''<html><body>
+<a href="about/">About</a>
+<a href="/missing.html">Missing</a>
+<a href="#top">Top</a>
+<a href="mailto:team@example.com">Mail</a>
+<img src="logo.png">
+<a href="{stub_server}/ok">Ok</a>
+<a href="{stub_server}/gone">Gone</a>
+<a href="{stub_server}/no-head">No HEAD</a>
+</body></html>''')
+    cache_dir = str(tmp_path / 'cache')
+    original_cache = link_checker.LinkCache
+    monkeypatch.setattr(link_checker, 'LinkCache', lambda: original_cache(cache_dir))
+    monkeypatch.setattr(link_checker, 'LINK_CHECK_HOST_INTERVAL', 0)
+    return str(repo)
+
+
+def results_by_url(results, server=''):
+    return {result['url'].replace(server, ''): result for result in results}
+
+
+def test_check_links_reports_internal_and_external_results(site, stub_server):
+    results = results_by_url(link_checker.check_links(site, workers=1), stub_server)
+
+    assert set(results) == {'about/', '/missing.html', 'logo.png', '/ok', '/gone', '/no-head'}
+    assert results['about/']['ok'] and results['logo.png']['ok']
+    assert results['/missing.html']['error'] == 'missing.html not found'
+    assert results['/ok']['ok'] and results['/no-head']['ok']
+    assert results['/gone']['ok'] is False and results['/gone']['status'] == 404
+
+
+def test_check_links_serves_external_results_from_cache(site, stub_server, monkeypatch):
+    link_checker.check_links(site, workers=1)
+
+    def fail(*args):
+        raise AssertionError("cached URL was requested again")
+    monkeypatch.setattr(link_checker, 'check_external', fail)
+    results = results_by_url(link_checker.check_links(site, workers=1), stub_server)
+    assert results['/ok']['ok'] and results['/gone']['ok'] is False
+
+
+def test_cancelled_check_reports_unchecked_links(site, stub_server):
+    results = results_by_url(link_checker.check_links(site, workers=1, job=CancelledJob()), stub_server)
+
+    for url in ('/ok', '/gone', '/no-head'):
+        assert results[url]['ok'] is None
+        assert results[url]['error'] == 'not checked'
+    assert results['/missing.html']['ok'] is False
+    assert link_checker.link_check_summary(results.values()) == '1 broken, 3 not checked'
+
+
+def test_internal_links_resolve_against_base_href(site):
+    archive = os.path.join(site, 'archive')
+    os.mkdir(archive)
+    with open(os.path.join(archive, 'index.html'), 'w') as file:
+        file.write('<html><head><base href="../"></head><body><a href="about/">About</a><img src="archive/gone.png"></body></html>')
+    results = [result for result in link_checker.check_links(site, check_external_links=False, workers=1) if result['file'] == 'archive/index.html']
+
+    assert {result['url']: result['ok'] for result in results} == {'about/': True, 'archive/gone.png': False}
+
+
+def test_internal_only_check_skips_external_links(site, stub_server):
+    results = results_by_url(link_checker.check_links(site, check_external_links=False, workers=1), stub_server)
+    assert '/ok' not in results